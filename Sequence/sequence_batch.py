@@ -0,0 +1,323 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: NumPy batch engine for "Sequence", advancing many games in lockstep for rollouts and self-play data.
+#          Boards are an (N,10,10) int8 array of chip codes, hands, drafts and discards are card-count arrays indexed
+#          as CARDS, and decks are arrays of card indices. Legal moves, placement and sequence detection are vectorised
+#          over games, down to the rules checkSeq uses to count and mark new sequences.
+#
+#          Run `python -m Sequence.sequence_batch [num_games]` to cross-check the engine against SequenceGameRule.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import sys
+import random
+import numpy as np
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceGameRule, CARDS, COORDS, WINDOWS
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+#Chip codes used on the batch boards, and the chip strings they stand for.
+CHIPS      = [EMPTY, RED, BLU, RED_SEQ, BLU_SEQ, JOKER]
+CHIP_CODE  = {chip:i for i,chip in enumerate(CHIPS)}
+EMPTY_CODE, RED_CODE, BLU_CODE, RED_SEQ_CODE, BLU_SEQ_CODE, JOKER_CODE = range(len(CHIPS))
+
+#Action kinds, matching the action types of SequenceGameRule.
+PLACE, REMOVE, TRADE = 0, 1, 2
+KINDS = ['place', 'remove', 'trade']
+
+NUM_CARDS  = len(CARDS)
+CARD_INDEX = {card:i for i,card in enumerate(CARDS)}
+TWO_EYED   = [CARD_INDEX['jd'], CARD_INDEX['jc']]
+ONE_EYED   = [CARD_INDEX['jh'], CARD_INDEX['js']]
+IS_JACK    = np.array([card[0]=='j' for card in CARDS])
+
+#CARD_CELLS[card,cell] is True if the (regular) card can be placed on the cell r*10+c.
+CARD_CELLS = np.zeros((NUM_CARDS,100), dtype=bool)
+for _card,_coords in COORDS.items():
+    if _card in CARD_INDEX and _card[0]!='j':
+        for _r,_c in _coords:
+            CARD_CELLS[CARD_INDEX[_card], _r*10+_c] = True
+
+JOKER_CELLS  = [r*10+c for r,c in COORDS['jk']]
+HEART_CELLS  = [44, 45, 54, 55]
+WINDOW_CELLS = np.array([[r*10+c for r,c in cells] for cells in WINDOWS]) #(W,5)
+CELL_WINDOW  = np.zeros((100,len(WINDOWS)), dtype=bool)                    #CELL_WINDOW[cell,w]: cell lies in window w.
+for _w,_cells in enumerate(WINDOW_CELLS):
+    CELL_WINDOW[_cells, _w] = True
+
+#LINE_CELLS[cell,o] holds the 9 cells checkSeq reads along orientation o (vr, hz, d1, d2) through the cell, in its
+#order, with 100 standing for off the board. LINE_WINDOWS picks the 5 windows of 5 cells out of a line.
+OFF_BOARD    = 100
+LINE_CELLS   = np.full((100,4,9), OFF_BOARD)
+for _cell in range(100):
+    _r,_c = divmod(_cell, 10)
+    for _o,(_dr,_dc) in enumerate([(1,0), (0,1), (1,1), (1,-1)]):
+        for _k,_i in enumerate(range(-4,5)):
+            if 0<=_r+_i*_dr<=9 and 0<=_c+_i*_dc<=9:
+                LINE_CELLS[_cell,_o,_k] = (_r+_i*_dr)*10 + _c+_i*_dc
+LINE_WINDOWS = np.arange(5)[:,None] + np.arange(5)[None] #(5,5)
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+class BatchGame:
+    def __init__(self, num_games, num_agents=4, seed=None):
+        self.num_games  = num_games
+        self.num_agents = num_agents
+        self.rng        = np.random.default_rng(seed)
+        N = num_games
+
+        self.boards     = np.full((N,10,10), EMPTY_CODE, dtype=np.int8)
+        self.boards.reshape(N,100)[:, JOKER_CELLS] = JOKER_CODE
+        self.decks      = np.argsort(self.rng.random((N,2*NUM_CARDS)), axis=1).astype(np.int16) % NUM_CARDS
+        self.deck_sizes = np.full(N, 2*NUM_CARDS, dtype=np.int16)
+        self.drafts     = np.zeros((N,NUM_CARDS), dtype=np.int8)
+        self.hands      = np.zeros((N,num_agents,NUM_CARDS), dtype=np.int8)
+        self.discards   = np.zeros((N,NUM_CARDS), dtype=np.int8)
+        self.turn       = np.zeros(N, dtype=np.int8)     #Agent to move in each game.
+        self.traded     = np.zeros(N, dtype=bool)        #Whether that agent has already traded a dead card this turn.
+        self.seqs       = np.zeros((N,num_agents), dtype=np.int8) #Completed sequences, i.e. scores.
+        self.done       = np.zeros(N, dtype=bool)
+
+        games = np.arange(N)
+        self._deal(self.drafts, games, 5)
+        for a in range(num_agents):
+            self._deal(self.hands[:,a], games, 6)
+
+    #Deals num_cards cards from each listed game's deck into counts[game], a card at a time, while cards remain.
+    def _deal(self, counts, games, num_cards):
+        for _ in range(num_cards):
+            games = games[self.deck_sizes[games] > 0]
+            if not len(games):
+                return
+            pos  = self.rng.integers(0, self.deck_sizes[games])
+            last = self.deck_sizes[games] - 1
+            cards = self.decks[games, pos]
+            self.decks[games, pos] = self.decks[games, last]
+            self.deck_sizes[games] = last
+            counts[games, cards] += 1
+
+    def colours(self, agents):
+        return np.where(agents%2, BLU_CODE, RED_CODE), np.where(agents%2, BLU_SEQ_CODE, RED_SEQ_CODE)
+
+    #Legal moves of the agent to move in every game, following SequenceGameRule.getActionSpace:
+    #  play    (N,52,100) card can be placed on / remove a chip from the cell
+    #  trade   (N,52)     card is dead and can be traded in
+    #  forego  (N,)       the game is in the trading phase, where not trading is also allowed (and nothing else)
+    #  draft   (N,52)     card can be drafted at the end of the move
+    def legalMasks(self):
+        N = self.num_games
+        agents = self.turn.astype(np.int64)
+        hand = self.hands[np.arange(N), agents] > 0
+        flat = self.boards.reshape(N,100)
+        empty = flat==EMPTY_CODE
+        opp,_ = self.colours(agents+1)
+
+        live  = CARD_CELLS[None] & empty[:,None,:]
+        play  = live & hand[:,:,None]
+        play[:, TWO_EYED] = empty[:,None,:] & hand[:, TWO_EYED, None]
+        play[:, ONE_EYED] = (flat==opp[:,None])[:,None,:] & hand[:, ONE_EYED, None]
+        draft = self.drafts > 0
+
+        trade  = hand & ~IS_JACK[None] & ~live.any(2) & ~self.traded[:,None]
+        forego = trade.any(1) & draft.any(1)
+        trade[~forego] = False
+        play[forego]   = False
+
+        play[self.done]   = False
+        trade[self.done]  = False
+        forego[self.done] = False
+        draft[self.done]  = False
+        return play, trade, forego, draft
+
+    #Picks a uniformly random legal play (or trade) and draft card in every game. Returns kind, card, cell and draft
+    #arrays as taken by step(); -1 stands for None. Games without any legal move are marked done.
+    def randomActions(self):
+        play, trade, forego, draft = self.legalMasks()
+        N = self.num_games
+        play = play.reshape(N,-1)
+        options = np.concatenate([trade, forego[:,None]], axis=1)
+
+        play_pick  = (self.rng.random(play.shape) * play).argmax(1)
+        trade_pick = (self.rng.random(options.shape) * options).argmax(1)
+        draft_pick = (self.rng.random(draft.shape) * draft).argmax(1)
+
+        card = np.where(forego, np.where(trade_pick<NUM_CARDS, trade_pick, -1), play_pick//100)
+        cell = np.where(forego, -1, play_pick%100)
+        kind = np.where(forego, TRADE, np.where(np.isin(card, ONE_EYED), REMOVE, PLACE))
+        draft_card = np.where(card>=0, draft_pick, -1)
+        self.done |= ~(play.any(1) | forego)
+        return kind, card, cell, draft_card
+
+    #Applies one action in every game that is not over. Mirrors SequenceGameRule.apply and update: the card is played
+    #and the draft card taken, the draft replenished, the chip placed or removed, new sequences scored, and the turn
+    #passed on unless the action was a trade.
+    def step(self, kind, card, cell, draft):
+        N = self.num_games
+        games  = np.nonzero(~self.done)[0]
+        agents = self.turn[games].astype(np.int64)
+
+        played = card[games] >= 0
+        g,a = games[played], agents[played]
+        self.hands[g, a, card[g]]  -= 1
+        self.discards[g, card[g]]  += 1
+        self.drafts[g, draft[g]]   -= 1
+        self.hands[g, a, draft[g]] += 1
+        self._deal(self.drafts, g, 1)
+
+        flat = self.boards.reshape(N,100)
+        placed = kind[games]==PLACE
+        g,a = games[placed], agents[placed]
+        flat[g, cell[g]] = self.colours(a)[0]
+        removed = games[kind[games]==REMOVE]
+        flat[removed, cell[removed]] = EMPTY_CODE
+        self._scoreSequences(g, a, cell[g])
+
+        traded = kind[games]==TRADE
+        self.traded[games[traded]] = True
+        full = games[~traded]
+        self.traded[full] = False
+        self.turn[full] = (self.turn[full]+1) % self.num_agents
+
+        team_seqs = np.stack([self.seqs[:, team::2].sum(1) for team in range(2)], axis=1)
+        self.done |= (team_seqs >= 2).any(1) | (self.drafts.sum(1) == 0)
+
+    #Scores new sequences as checkSeq does, vectorised over games. Windows through the new chip are counted first: a
+    #new sequence needs one whose 5 cells all hold the agent's chips, sequence chips or jokers, or a completed heart.
+    #The games that pass are checked along the four lines through the chip, following checkSeq's rules:
+    #  - 9 chips in a row count twice, on top of the run of 5 the same line also holds;
+    #  - a line without sequence chips scores its first window of 5 chips;
+    #  - a line with them scores its first window holding at most one, trying all-chip windows first, then the one
+    #    sequence chip last to first. Once a line has scored this way, later lines only look for all-chip windows.
+    #Every cell of a scored window, but jokers, becomes a sequence chip.
+    def _scoreSequences(self, games, agents, cells):
+        if not len(games):
+            return
+        flat = self.boards.reshape(self.num_games,100)
+        clr,sclr  = self.colours(agents)
+        opp,osclr = self.colours(agents+1)
+        board = flat[games]
+        owned = (board==clr[:,None]) | (board==sclr[:,None]) | (board==JOKER_CODE)
+        windows = (owned[:, WINDOW_CELLS].sum(2) == 5) & CELL_WINDOW[cells]
+        heart = board[:, HEART_CELLS]
+        heart = (heart!=EMPTY_CODE).all(1) & ((heart==clr[:,None]) | (heart==sclr[:,None])).any(1) \
+                & ~((heart==opp[:,None]) | (heart==osclr[:,None])).any(1)
+        candidate = windows.any(1) | heart
+        if not candidate.any():
+            return
+        games, clr, sclr, heart = games[candidate], clr[candidate], sclr[candidate], heart[candidate]
+        board = np.concatenate([board[candidate], np.full((len(games),1), -1, dtype=board.dtype)], axis=1)
+        line_cells = LINE_CELLS[cells[candidate]]                       #(G,4,9)
+        lines = board[np.arange(len(games))[:,None,None], line_cells]
+        chip  = (lines==clr[:,None,None]) | (lines==JOKER_CODE)
+        seq   = lines==sclr[:,None,None]
+        chip_w, seq_w = chip[..., LINE_WINDOWS], seq[..., LINE_WINDOWS] #(G,4,5,5)
+
+        #Matches of each window against checkSeq's patterns: all chips, then one sequence chip at place 4, 3, .., 0.
+        one_seq  = (chip_w | seq_w).all(3) & (seq_w.sum(3) == 1)
+        patterns = np.stack([chip_w.all(3)] + [one_seq & seq_w[..., p] for p in range(4,-1,-1)], axis=2) #(G,4,6,5)
+        nine    = chip.all(2)
+        mixed   = seq.any(2)
+        fast    = patterns[:,:,0].any(2) & ~mixed
+        num_seq = 2*heart + 2*nine.sum(1) + fast.sum(1)
+        starts  = np.where(fast, patterns[:,:,0].argmax(2), -1) #Start of the scored window in each line, or -1.
+        found   = np.zeros(len(games), dtype=bool)
+        for o in range(4):
+            options = patterns[:,o].copy()
+            options[found, 1:] = False
+            slow  = mixed[:,o] & options.any((1,2))
+            first = options.reshape(len(games),-1).argmax(1) % 5
+            starts[slow,o] = first[slow]
+            num_seq += slow
+            found   |= slow
+        k = np.arange(9)
+        marked = nine[...,None] | ((starts[...,None] >= 0) & (k >= starts[...,None]) & (k < starts[...,None]+5))
+
+        g,o,k = np.nonzero(marked)
+        sequence_cells = line_cells[g,o,k]
+        flat[games[g], sequence_cells] = np.where(flat[games[g], sequence_cells]==JOKER_CODE, JOKER_CODE, sclr[g])
+        flat[games[heart,None], HEART_CELLS] = sclr[heart,None]
+        self.seqs[games, agents[candidate]] += num_seq.astype(self.seqs.dtype)
+
+    #Copies a SequenceState into game slot n, with agent_id to move.
+    def loadState(self, n, state, agent_id):
+        self.boards[n] = [[CHIP_CODE[chip] for chip in row] for row in state.board.chips]
+        cards = [CARD_INDEX[card] for card in getattr(state.deck, 'cards', [])]
+        self.decks[n, :len(cards)] = cards
+        self.deck_sizes[n] = len(cards)
+        self.drafts[n]   = np.bincount([CARD_INDEX[card] for card in state.board.draft], minlength=NUM_CARDS)
+        self.discards[n] = np.bincount([CARD_INDEX[card] for card in state.deck.discards], minlength=NUM_CARDS)
+        for a,plr_state in enumerate(state.agents):
+            self.hands[n,a] = np.bincount([CARD_INDEX[card] for card in plr_state.hand], minlength=NUM_CARDS)
+            self.seqs[n,a]  = plr_state.completed_seqs
+        self.turn[n]   = agent_id
+        self.traded[n] = state.agents[agent_id].trade
+        self.done[n]   = False
+
+    #The game's legal plays, tradeable cards, forego option and draft cards, as sets comparable with getActionSpace.
+    def legalSets(self, n, masks=None):
+        play, trade, forego, draft = masks or self.legalMasks()
+        plays = {(CARDS[c], 'remove' if c in ONE_EYED else 'place', divmod(int(p),10)) for c,p in zip(*np.nonzero(play[n]))}
+        plays |= {(CARDS[c], 'trade', None) for c in np.nonzero(trade[n])[0]}
+        return plays, bool(forego[n]), {CARDS[c] for c in np.nonzero(draft[n])[0]}
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Plays num_games random games with the reference engine, and at every move checks that the batch engine (loaded with
+#the same position) produces the same legal moves, and the same board, hands and scores after the move. The card dealt
+#to the draft is random in both engines, so the batch game is reloaded from the reference after each move.
+#Returns the number of positions checked, and raises AssertionError on the first mismatch.
+def CrossCheck(num_games=100, seed=0):
+    random.seed(seed)
+    rules = [SequenceGameRule(4) for _ in range(num_games)]
+    batch = BatchGame(num_games, 4, seed)
+    for n,rule in enumerate(rules):
+        batch.loadState(n, rule.current_game_state, rule.current_agent_index)
+
+    checked = 0
+    while not batch.done.all():
+        masks = batch.legalMasks()
+        kind, card, cell, draft = [np.full(num_games, -1) for _ in range(4)]
+        for n,rule in enumerate(rules):
+            if batch.done[n]:
+                continue
+            state = rule.current_game_state
+            space = rule.getActionSpace(state, rule.current_agent_index)
+            plays, forego, drafts = batch.legalSets(n, masks)
+            assert plays == set(space.plays), (n, plays ^ set(space.plays))
+            assert forego == bool(space.extra), n
+            assert not space.plays or drafts == set(state.board.draft), n
+            if not len(space): #No legal move at all; the reference Game cannot continue this game either.
+                batch.done[n] = True
+                continue
+            action = random.choice(space)
+            kind[n] = KINDS.index(action['type'])
+            card[n] = -1 if action['play_card'] is None else CARD_INDEX[action['play_card']]
+            draft[n] = -1 if action['draft_card'] is None else CARD_INDEX[action['draft_card']]
+            cell[n] = -1 if action['coords'] is None else action['coords'][0]*10+action['coords'][1]
+            rule.update(action)
+            checked += 1
+
+        batch.step(kind, card, cell, draft)
+        for n,rule in enumerate(rules):
+            if kind[n] < 0:
+                continue
+            state = rule.current_game_state
+            assert batch.boards[n].tolist() == [[CHIP_CODE[chip] for chip in row] for row in state.board.chips], n
+            assert [int(s) for s in batch.seqs[n]] == [plr.completed_seqs for plr in state.agents], n
+            for a,plr_state in enumerate(state.agents):
+                assert batch.hands[n,a].tolist() == np.bincount([CARD_INDEX[c] for c in plr_state.hand], minlength=NUM_CARDS).tolist(), (n,a)
+            assert batch.turn[n] == rule.current_agent_index, n
+            assert batch.done[n] == rule.gameEnds(), n
+            batch.loadState(n, state, rule.current_agent_index)
+            batch.done[n] = rule.gameEnds()
+    return checked
+
+
+if __name__ == '__main__':
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print("Cross-checked {} positions against SequenceGameRule: OK".format(CrossCheck(num_games)))
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,322 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Bitboard-backed board representation for "Sequence". Each chip type is kept as a 100-bit integer mask
+#          (bit r*10+c for cell (r,c)), and a write-through `chips` view keeps list-of-lists agents working.
+#          Sequences are found by ANDing precomputed 5-cell window masks with a colour's chips.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceState, SequenceGameRule, Action, ActionSpace, COORDS, WindowCounts, \
+                                     EmptyCounts
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+FULL_MASK  = (1 << 100) - 1
+CELL_BIT   = [[1 << (r*10+c) for c in range(10)] for r in range(10)]
+CHIP_TYPES = [EMPTY, RED, BLU, RED_SEQ, BLU_SEQ, JOKER]
+
+#Store dict of cards and the mask of their board cells, mirroring COORDS.
+CARD_MASK = {card:sum(CELL_BIT[r][c] for r,c in coords) for card,coords in COORDS.items()}
+JOKER_MASK = CARD_MASK['jk']
+
+#The "heart of the board" (2h, 3h, 4h, 5h), in the order checkSeq reports its coordinates.
+HEART_COORDS = [(4,4),(4,5),(5,4),(5,5)]
+HEART_MASK   = sum(CELL_BIT[r][c] for r,c in HEART_COORDS)
+
+#For every cell and orientation, the line checkSeq scans: the cells up to 4 steps either side of the cell, clipped to
+#the board, the mask of those cells, and each 5-cell window along the line as (start index, window mask, cell bits).
+#The windows through the cell itself are also kept, tagged with their orientation, to find where a new sequence may be.
+LINES = {}
+CELL_LINE_WINDOWS = {}
+for row in range(10):
+    for col in range(10):
+        LINES[row,col] = []
+        CELL_LINE_WINDOWS[row,col] = []
+        for name,(dr,dc) in [('vr',(1,0)), ('hz',(0,1)), ('d1',(1,1)), ('d2',(1,-1))]:
+            cells = [(row+i*dr, col+i*dc) for i in range(-4,5)]
+            cells = [(r,c) for r,c in cells if 0<=min(r,c) and 9>=max(r,c)]
+            bits  = [CELL_BIT[r][c] for r,c in cells]
+            windows = [(start, sum(bits[start:start+5]), bits[start:start+5]) for start in range(len(cells)-4)]
+            LINES[row,col].append((name, cells, sum(bits), windows))
+            CELL_LINE_WINDOWS[row,col].extend((name, mask) for _,mask,_ in windows if CELL_BIT[row][col] & mask)
+
+#Positions of the sequence chip in the patterns checkSeq accepts when a line crosses an existing sequence, in the order
+#it tries them: clr*5, clr*4+sclr, clr*3+sclr+clr, clr*2+sclr+clr*2, clr+sclr+clr*3, sclr+clr*4.
+SEQ_PATTERNS = [None, 4, 3, 2, 1, 0]
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Yields the (row,col) coordinates of every set bit, in the same row-major order as a nested range(10) loop.
+def BitCoords(mask):
+    while mask:
+        low  = mask & -mask
+        mask ^= low
+        yield divmod(low.bit_length()-1, 10)
+
+#Same coordinates as BitCoords, as a list. Building the list in one loop is cheaper than running a generator.
+def BitCoordList(mask):
+    coords = []
+    while mask:
+        low  = mask & -mask
+        mask ^= low
+        coords.append(divmod(low.bit_length()-1, 10))
+    return coords
+
+def BitCount(mask):
+    return bin(mask).count('1')
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#A single row of the compatibility chips view. It is a real list, so reads cost no more than on a list-based board,
+#and writes go through the board so that its masks stay in step.
+#Rows are made by ChipsView, which sets `board` and `row` on each.
+class ChipRow(list):
+    __slots__ = ('board', 'row')
+
+    def __setitem__(self, col, chip):
+        if isinstance(col, slice):
+            for c,new_chip in zip(range(10)[col], chip):
+                self.board.setChip(self.row, c, new_chip)
+        else:
+            self.board.setChip(self.row, range(10)[col], chip)
+
+    #Copying a row (or the whole view) hands out plain lists, so agents' scratch boards are independent of the board.
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return list(self)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+#Stands in for the 10x10 list of chip strings held by SequenceState.BoardState, as a list of ChipRows.
+class ChipsView(list):
+    __slots__ = ('board',)
+
+    def __init__(self, board, chips):
+        rows = []
+        for r,chips_row in enumerate(chips):
+            row = ChipRow(chips_row)
+            row.board = board
+            row.row   = r
+            rows.append(row)
+        super().__init__(rows)
+        self.board = board
+
+    def __setitem__(self, row, chips):
+        self[row][:] = chips
+
+    def __copy__(self):
+        return [list(row) for row in self]
+
+    def __deepcopy__(self, memo):
+        return [list(row) for row in self]
+
+    def __reduce__(self):
+        return (list, ([list(row) for row in self],))
+
+
+#Drop-in replacement for SequenceState.BoardState. Every chip type has a mask, and each cell is set in exactly one.
+#The chips view holds the same chips cell by cell, and setChip keeps the two in step.
+#The coordinate lists are still kept as lists, and the game rules update them exactly as they do for BoardState.
+class BitBoardState:
+    def __init__(self):
+        self.new_seq = False
+        self.draft   = []
+        self.masks   = {chip:0 for chip in CHIP_TYPES}
+        self.masks[JOKER] = JOKER_MASK
+        self.masks[EMPTY] = FULL_MASK ^ JOKER_MASK
+        self.plr_coords   = {RED:[], BLU:[]}
+        self.empty_coords = BitCoordList(self.masks[EMPTY])
+        self._chips = ChipsView(self, self._chipsFromMasks())
+        self.window_counts = WindowCounts(self._chips)
+        self.empty_counts  = EmptyCounts(self._chips)
+
+    #Builds a bitboard from a list-based board, e.g. one freshly created by SequenceState.
+    @classmethod
+    def fromBoard(cls, board):
+        bitboard = cls.__new__(cls) #Everything __init__ would work out is taken from the board instead.
+        bitboard.masks = {chip:0 for chip in CHIP_TYPES}
+        for r in range(10):
+            for c in range(10):
+                bitboard.masks[board.chips[r][c]] |= CELL_BIT[r][c]
+        bitboard._chips       = ChipsView(bitboard, board.chips)
+        bitboard.new_seq      = board.new_seq
+        bitboard.draft        = list(board.draft)
+        bitboard.plr_coords   = {clr:list(coords) for clr,coords in board.plr_coords.items()}
+        bitboard.empty_coords = list(board.empty_coords)
+        bitboard.window_counts = {clr:list(counts) for clr,counts in board.window_counts.items()}
+        bitboard.empty_counts  = dict(board.empty_counts)
+        return bitboard
+
+    def _chipsFromMasks(self):
+        chips = [[None]*10 for _ in range(10)]
+        for chip,mask in self.masks.items():
+            for r,c in BitCoords(mask):
+                chips[r][c] = chip
+        return chips
+
+    def getChip(self, r, c):
+        return self._chips[r][c]
+
+    def setChip(self, r, c, chip):
+        row = self._chips[r]
+        bit = CELL_BIT[r][c]
+        self.masks[row[c]] ^= bit
+        self.masks[chip] |= bit
+        list.__setitem__(row, c, chip)
+
+    @property
+    def chips(self):
+        return self._chips
+
+    #Copies the board without going through the generic deepcopy machinery: the masks are ints and every container
+    #holds plain values, so one level of copying is enough.
+    def clone(self):
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new.masks  = dict(self.masks)
+        new._chips = ChipsView(new, self._chips)
+        new.draft  = list(self.draft)
+        new.plr_coords    = {clr:list(coords) for clr,coords in self.plr_coords.items()}
+        new.empty_coords  = list(self.empty_coords)
+        new.window_counts = {clr:list(counts) for clr,counts in self.window_counts.items()}
+        new.empty_counts  = dict(self.empty_counts)
+        return new
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    #The chips view points back at this board, so it is rebuilt from the masks rather than copied or pickled.
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_chips']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._chips = ChipsView(self, self._chipsFromMasks())
+
+
+#Same rules as SequenceGameRule, played on a BitBoardState. Move generation, dead-card checks and sequence detection
+#use mask arithmetic, and chips are placed and removed by setting and clearing bits.
+class BitboardGameRule(SequenceGameRule):
+    def initialGameState(self):
+        state = SequenceState(self.num_of_agent, self.seed)
+        state.board = BitBoardState.fromBoard(state.board)
+        return state
+
+    #Same result as SequenceGameRule.checkSeq, read off the masks: a window is owned when ANDing its mask with the
+    #colour's chips, sequence chips and jokers gives the window back. The board's joker cells are left as they are.
+    #The window counts only tell it to skip orientations: the masks already say which windows are full.
+    def checkSeq(self, chips, plr_state, last_coords, window_counts=None):
+        if not isinstance(chips, ChipsView): #Fall back to the list-based rules for any other board.
+            return super().checkSeq(chips, plr_state, last_coords, window_counts)
+        masks      = chips.board.masks
+        own        = masks[plr_state.colour] | masks[JOKER] #Jokers count as player chips.
+        seq_chips  = masks[plr_state.seq_colour]
+        owned      = own | seq_chips
+        seq_type   = TRADSEQ
+        seq_coords = []
+        seq_found  = {'vr':0, 'hz':0, 'd1':0, 'd2':0, 'hb':0}
+        found      = False
+
+        #First, check "heart of the board". The heart holds no jokers, so it is possessed when all 4 cells are owned.
+        if owned & HEART_MASK == HEART_MASK:
+            seq_type = HOTBSEQ
+            seq_found['hb']+=2
+            seq_coords.append(list(HEART_COORDS))
+
+        #Only orientations holding a window of 5 owned cells through the new chip can contain a new sequence.
+        orientations = ['vr', 'hz', 'd1', 'd2']
+        if window_counts is not None:
+            orientations = {name for name,mask in CELL_LINE_WINDOWS[last_coords] if owned & mask == mask}
+            if not orientations and not seq_found['hb']:
+                return (None,None)
+
+        for seq_name,coord_list,line_mask,windows in LINES[last_coords]:
+            if seq_name not in orientations:
+                continue
+            #Check if there exists 4 player chips either side of new chip (counts as forming 2 sequences).
+            if len(coord_list)==9 and own & line_mask == line_mask:
+                seq_found[seq_name]+=2
+                seq_coords.append(list(coord_list))
+            #If this potential sequence doesn't overlap an established sequence, take the first run of 5 chips.
+            if not seq_chips & line_mask:
+                for start,mask,_ in windows:
+                    if own & mask == mask:
+                        seq_found[seq_name] += 1
+                        seq_coords.append(coord_list[start:start+5])
+                        break
+            else: #Check for sequences of 5 player chips, with a max. 1 chip from an existing sequence.
+                for seq_idx in SEQ_PATTERNS:
+                    for start,mask,bits in windows:
+                        if seq_idx is None:
+                            match = own & mask == mask
+                        else:
+                            rest  = mask ^ bits[seq_idx]
+                            match = seq_chips & bits[seq_idx] and own & rest == rest
+                        if match:
+                            seq_found[seq_name]+=1
+                            seq_coords.append(coord_list[start:start+5])
+                            found = True
+                            break
+                    if found:
+                        break
+
+        num_seq = sum(seq_found.values())
+        if num_seq > 1 and seq_type != HOTBSEQ:
+            seq_type = MULTSEQ
+        return ({'num_seq':num_seq, 'orientation':[k for k,v in seq_found.items() if v], 'coords':seq_coords}, seq_type) if num_seq else (None,None)
+
+    #Same as SequenceGameRule._setChip, with the cell's bit moved from the old chip's mask to the new one's.
+    def _setChip(self, board, r, c, chip):
+        if not isinstance(board, BitBoardState): #Fall back to the list-based rules for any other board.
+            return super()._setChip(board, r, c, chip)
+        board.setChip(r, c, chip)
+
+    def getActionSpace(self, game_state, agent_id):
+        board = game_state.board
+        if not isinstance(board, BitBoardState): #Fall back to the list-based rules for any other board.
+            return super().getActionSpace(game_state, agent_id)
+
+        plays = []
+        agent_state = game_state.agents[agent_id]
+        draft = list(board.draft)
+        empty = board.masks[EMPTY]
+
+        #First, give the agent the option to trade a dead card, if they haven't just done so.
+        if not agent_state.trade:
+            for card in agent_state.hand:
+                if card[0]!='j' and not CARD_MASK[card] & empty:
+                    plays.append((card, 'trade', None))
+
+            if len(plays) and len(draft): #If trade actions available, return those, along with the option to forego the trade.
+                return ActionSpace(plays, draft, [Action(None, None, 'trade', None)])
+            plays = []
+
+        #If trade is prohibited, or no trades available, add action/s for each card in player's hand.
+        #The cells of each kind of jack are listed once, however many of them are in the hand.
+        jack_coords = {}
+        for card in agent_state.hand:
+            if card in ['jd','jc']: #two-eyed jacks
+                if 'place' not in jack_coords:
+                    jack_coords['place'] = BitCoordList(empty)
+                plays.extend([(card, 'place', coords) for coords in jack_coords['place']])
+            elif card in ['jh','js']: #one-eyed jacks
+                if 'remove' not in jack_coords:
+                    jack_coords['remove'] = BitCoordList(board.masks[agent_state.opp_colour])
+                plays.extend([(card, 'remove', coords) for coords in jack_coords['remove']])
+            elif CARD_MASK[card] & empty: #regular cards, with their (at most two) cells tested bit by bit
+                for r,c in COORDS[card]:
+                    if CELL_BIT[r][c] & empty:
+                        plays.append((card, 'place', (r,c)))
+
+        return ActionSpace(plays, draft)
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -8,8 +8,6 @@
 
 from template import Displayer
 from Sequence.sequence_utils import *
-import tkinter
-from tkinter import font
 import copy
 import time
 
@@ -27,8 +25,18 @@ DRFT_SEP = 160  #Separation between drafted cards.
 C_WIDTH  = 1920 #Canvas dimensions.
 C_HEIGHT = 1080
 
+#tkinter is imported by the first GUIDisplayer to be initialised, so text-only and headless runs never load it.
+tkinter = None
+
 # CLASS DEF ----------------------------------------------------------------------------------------------------------#
 
+def load_tkinter():
+    global tkinter
+    if tkinter is None:
+        import tkinter as tk
+        tkinter = tk
+    return tkinter
+
 def make_label(master, x, y, h, w, *args, **kwargs):
     f = tkinter.Frame(master, height=h, width=w)
     f.pack_propagate(0)
@@ -93,7 +101,11 @@ class GUIDisplayer(Displayer):
         self.delay = delay
                 
     def InitDisplayer(self, runner):
+        #A replay can seek() back to any move, so its history only needs to record how many moves each entry follows.
+        self.replayer = runner if hasattr(runner, 'seek') else None
+
         #Initialise root frame.
+        load_tkinter()
         self.root = tkinter.Tk()
         self.root.title("Sequence! ------ COMP90054 AI Planning for Autonomy")
         self.root.tk.call('wm', 'iconphoto', self.root._w, tkinter.PhotoImage(file='Sequence/resources/icon_main.png'))
@@ -152,7 +164,10 @@ class GUIDisplayer(Displayer):
         
     def _InsertState(self, text, game_state):
         text = text.replace("\n ","")
-        self.game_state_history.append(copy.deepcopy(game_state))
+        if self.replayer is not None:
+            self.game_state_history.append(self.replayer.move_index)
+        else:
+            self.game_state_history.append(copy.deepcopy(game_state))
         self.move_box.insert(tkinter.END,text)
         self.move_box.see(tkinter.END)
         self.move_box.selection_clear(0, last=None) 
@@ -170,6 +185,11 @@ class GUIDisplayer(Displayer):
         self.board_area.update(game_state.board, self.resources)
         self.canvas.update()
 
+    #Displays the state after the history entry at index i, seeking the replay back or forth to it where possible.
+    def _DisplayHistory(self, i):
+        entry = self.game_state_history[i]
+        self._DisplayState(self.replayer.seek(entry) if self.replayer is not None else entry)
+
     def ExcuteAction(self,player_id,move, game_state):
         self._InsertState(ActionToString(player_id, move, game_state.board.new_seq), game_state)
         self._DisplayState(game_state)
@@ -193,7 +213,7 @@ class GUIDisplayer(Displayer):
             w = event.widget
             self.focus = int(w.curselection()[0])
             if self.focus < len(self.game_state_history):
-                self._DisplayState(self.game_state_history[self.focus])
+                self._DisplayHistory(self.focus)
         def OnHistoryAction(event):
             if event.keysym == "Up":
                 if self.focus>0:
@@ -201,13 +221,13 @@ class GUIDisplayer(Displayer):
                     self.focus -=1
                     self.move_box.select_set(self.focus)
                     if self.focus < len(self.game_state_history):
-                        self._DisplayState(self.game_state_history[self.focus])
+                        self._DisplayHistory(self.focus)
             if event.keysym == "Down":
                 if self.focus<len(self.game_state_history)-1:
                     self.move_box.select_clear(self.focus)
                     self.focus +=1
                     self.move_box.select_set(self.focus)
-                    self._DisplayState(self.game_state_history[self.focus])
+                    self._DisplayHistory(self.focus)
 
         self.move_box.bind('<<ListboxSelect>>', OnHistorySelect)
         self.move_box.bind('<Up>', OnHistoryAction)
@@ -29,25 +29,175 @@ COORDS = defaultdict(list)
 for row in range(10):
     for col in range(10):
         COORDS[BOARD[row][col]].append((row,col))
-        
+
+#Store every 5-in-a-row window on the board, tagged with the orientation names used by checkSeq, and the windows
+#passing through each cell. A new sequence can only be formed in a window through the last chip placed.
+WINDOWS = []
+WINDOW_ORIENTATION = []
+for name,(dr,dc) in [('vr',(1,0)), ('hz',(0,1)), ('d1',(1,1)), ('d2',(1,-1))]:
+    for row in range(10):
+        for col in range(10):
+            cells = tuple((row+i*dr, col+i*dc) for i in range(5))
+            if all(0<=r<=9 and 0<=c<=9 for r,c in cells):
+                WINDOWS.append(cells)
+                WINDOW_ORIENTATION.append(name)
+CELL_WINDOWS = defaultdict(list)
+for w,cells in enumerate(WINDOWS):
+    for coords in cells:
+        CELL_WINDOWS[coords].append(w)
+
+#Every card in a single deck (Sequence uses two).
+CARDS = [(r+s) for r in ['2','3','4','5','6','7','8','9','t','j','q','k','a'] for s in ['d','c','h','s']]
+
+#Zobrist keys for SequenceState.zobrist. They come from a private, fixed-seed generator, so hashes are stable across
+#runs and the game's own random stream is left untouched. Empty and joker cells hash to 0. Draft keys are per copy of
+#a card (the draft is hashed as a multiset, so the order cards were drafted in doesn't matter).
+_zobrist_rng  = random.Random(90054)
+ZOBRIST_CHIPS = [[{EMPTY:0, JOKER:0, **{chip:_zobrist_rng.getrandbits(64) for chip in [RED,BLU,RED_SEQ,BLU_SEQ]}}
+                  for _ in range(10)] for _ in range(10)]
+ZOBRIST_DRAFT = {card:[_zobrist_rng.getrandbits(64) for _ in range(2)] for card in CARDS}
+ZOBRIST_AGENT = [_zobrist_rng.getrandbits(64) for _ in range(8)]
+ZOBRIST_TRADE = _zobrist_rng.getrandbits(64)
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Counts, per colour and per window, the cells that colour owns for sequence purposes (its chips, sequence chips, jokers).
+def WindowCounts(chips):
+    owners = {RED:(RED,RED_SEQ,JOKER), BLU:(BLU,BLU_SEQ,JOKER)}
+    return {clr:[sum(chips[r][c] in owned for r,c in cells) for cells in WINDOWS] for clr,owned in owners.items()}
+
+#Counts, per card, the empty cells left among the two cells showing it. A card with none left is dead.
+def EmptyCounts(chips):
+    return {card:sum(chips[r][c]==EMPTY for r,c in COORDS[card]) for card in CARDS if card[0]!='j'}
+
+#Number of empty cells a card can still be placed on. Jacks are not on the board, so they are not counted here.
+def LiveCells(state, card):
+    return state.board.empty_counts[card]
+
+#True if a (non-jack) card has no empty cell left, i.e. it can only be traded.
+def IsDeadCard(state, card):
+    return card[0]!='j' and not state.board.empty_counts[card]
+
+#Cells holding chip, in row-major order. Bitboards are read off their masks, other boards are scanned.
+def _ChipCells(board, chip):
+    masks = getattr(board, 'masks', None)
+    if masks is None:
+        return [(r,c) for r in range(10) for c in range(10) if board.chips[r][c]==chip]
+    cells,mask = [],masks[chip]
+    while mask:
+        low  = mask & -mask
+        mask ^= low
+        cells.append(divmod(low.bit_length()-1, 10))
+    return cells
+
+#Draws an action uniformly at random from getLegalActions(state, agent_id) without listing them: only the options per
+#hand card are counted, and only the chosen card's cells are looked up. The draw picks the same action as indexing the
+#ActionSpace with rng.randrange(len(space)). rng is a random.Random (or the random module). Returns None if no action
+#is legal, i.e. the draft is empty.
+def SampleLegalAction(state, agent_id, rng=random):
+    agent_state = state.agents[agent_id]
+    board = state.board
+    draft = board.draft
+    if not len(draft):
+        return None
+
+    #Dead cards can be traded (or the trade foregone) before the agent plays a card.
+    if not agent_state.trade:
+        dead = [card for card in agent_state.hand if IsDeadCard(state, card)]
+        if dead:
+            idx = rng.randrange(len(dead)*len(draft)+1)
+            if idx == len(dead)*len(draft):
+                return Action(None, None, 'trade', None)
+            return Action(dead[idx//len(draft)], draft[idx%len(draft)], 'trade', None)
+
+    opp_cells = None
+    counts = []
+    for card in agent_state.hand:
+        if card in ['jd','jc']: #two-eyed jacks
+            counts.append(len(board.empty_coords))
+        elif card in ['jh','js']: #one-eyed jacks
+            if opp_cells is None:
+                opp_cells = _ChipCells(board, agent_state.opp_colour)
+            counts.append(len(opp_cells))
+        else:
+            counts.append(board.empty_counts[card])
+    if not sum(counts):
+        return None
+
+    play_idx,draft_idx = divmod(rng.randrange(sum(counts)*len(draft)), len(draft))
+    for card,count in zip(agent_state.hand, counts):
+        if play_idx < count:
+            break
+        play_idx -= count
+    if card in ['jd','jc']:
+        return Action(card, draft[draft_idx], 'place', _ChipCells(board, EMPTY)[play_idx])
+    if card in ['jh','js']:
+        return Action(card, draft[draft_idx], 'remove', opp_cells[play_idx])
+    cells = [(r,c) for r,c in COORDS[card] if board.chips[r][c]==EMPTY]
+    return Action(card, draft[draft_idx], 'place', cells[play_idx])
+
+#Computes the Zobrist hash of a state from scratch: chips per cell, draft cards, the agent to move and its trade flag.
+#SequenceGameRule.apply keeps state.zobrist up to date incrementally, so this is only needed for new states.
+def ZobristHash(state, agent_id=0):
+    key = ZOBRIST_AGENT[agent_id]
+    for r in range(10):
+        for c in range(10):
+            key ^= ZOBRIST_CHIPS[r][c][state.board.chips[r][c]]
+    for card in set(state.board.draft):
+        for k in range(state.board.draft.count(card)):
+            key ^= ZOBRIST_DRAFT[card][k]
+    if state.agents[agent_id].trade:
+        key ^= ZOBRIST_TRADE
+    return key
+
+#True once a team holds 2 sequences or the draft has run out. Kept on the state by SequenceGameRule.apply and undo,
+#so search agents can check simulated states without a game rule.
+def IsTerminal(state):
+    return state.terminal
+
+#Number of sequences completed by the team playing colour (RED or BLU).
+def TeamScore(state, colour):
+    return state.team_seqs[colour]
+
+#Recomputes the terminal flag from the team totals and the draft.
+def _Terminal(state):
+    return state.team_seqs[RED]>=2 or state.team_seqs[BLU]>=2 or len(state.board.draft)==0
+
+#A new object of obj's class sharing all of obj's attributes. clone() methods then replace the mutable ones.
+def _Shallow(obj):
+    new = obj.__class__.__new__(obj.__class__)
+    new.__dict__.update(obj.__dict__)
+    return new
+
+#Keeps a board's window counts in step with a chip of colour clr being added (delta=1) or taken away (delta=-1).
+def UpdateWindowCounts(board, coords, clr, delta):
+    counts = board.window_counts[clr]
+    for w in CELL_WINDOWS[coords]:
+        counts[w] += delta
+
 # CLASS DEF ----------------------------------------------------------------------------------------------------------#       
 
 #Represents game as a deck, board (with chips), and agents.
 class SequenceState(GameState):
+    #The deck shuffles with its own random.Random, which is copied and pickled along with the state, so dealing never
+    #depends on (or disturbs) the global random module. Without an rng (rng=None), it uses the global module as before.
     class Deck:
-        def __init__(self):
+        def __init__(self, rng=None):
+            self.rng = rng
             self.cards = self.new_deck()
             self.discards = []
             
+        def shuffle(self, cards):
+            (random if self.rng is None else self.rng).shuffle(cards)
+            
         def new_deck(self):
-            cards = [(r+s) for r in ['2','3','4','5','6','7','8','9','t','j','q','k','a'] for s in ['d','c','h','s']]
-            cards = cards*2 #Sequence uses 2 decks.
-            random.shuffle(cards)
+            cards = CARDS*2 #Sequence uses 2 decks.
+            self.shuffle(cards)
             return cards
             
         def deal(self, num_cards=1):
             hand = []
-            random.shuffle(self.cards)
+            self.shuffle(self.cards)
             for _ in range(num_cards):
                 try:
                     hand.append(self.cards.pop())
@@ -55,6 +205,16 @@ class SequenceState(GameState):
                     break
             return hand
             
+        def clone(self):
+            new = _Shallow(self)
+            if 'cards' in self.__dict__: #Not on agents' copies.
+                new.cards = list(self.cards)
+            new.discards = list(self.discards)
+            if getattr(self, 'rng', None) is not None:
+                new.rng = random.Random.__new__(random.Random) #Random() would first seed itself from os.urandom.
+                new.rng.setstate(self.rng.getstate())
+            return new
+            
     class BoardState:
         def __init__(self):
             self.new_seq = False
@@ -64,6 +224,18 @@ class SequenceState(GameState):
             self.empty_coords = [(r,c) for r in range(10) for c in range(10) if (r,c) not in COORDS['jk']]
             for r,c in COORDS['jk']:
                 self.chips[r][c] = JOKER
+            self.window_counts = WindowCounts(self.chips)
+            self.empty_counts = EmptyCounts(self.chips)
+            
+        def clone(self):
+            new = _Shallow(self)
+            new.chips = [list(row) for row in self.chips]
+            new.draft = list(self.draft)
+            new.plr_coords = {clr:list(coords) for clr,coords in self.plr_coords.items()}
+            new.empty_coords = list(self.empty_coords)
+            new.window_counts = {clr:list(counts) for clr,counts in self.window_counts.items()}
+            new.empty_counts = dict(self.empty_counts)
+            return new
             
     class AgentState:
         def __init__(self, _id):
@@ -80,9 +252,20 @@ class SequenceState(GameState):
             self.discard = None
             self.trade = False
             self.last_action = None
+            
+        #The trace's action history is only copied if asked for; otherwise the clone starts with an empty one.
+        def clone(self, include_history=False):
+            new = _Shallow(self)
+            new.agent_trace = _Shallow(self.agent_trace)
+            new.agent_trace.action_reward = list(self.agent_trace.action_reward) if include_history else []
+            if 'hand' in self.__dict__: #Not on agents' copies of other agents.
+                new.hand = list(self.hand) if self.hand is not None else None
+            new.seq_orientations = list(self.seq_orientations)
+            return new
 
-    def __init__(self, num_agents):
-        self.deck = self.Deck()
+    #With a seed, the state deals from its own RNG seeded with it. Without one, it deals from the global random module.
+    def __init__(self, num_agents, seed=None):
+        self.deck = self.Deck(None if seed is None else random.Random(seed))
         self.board = self.BoardState()
         self.agents = []
         #Deal draft cards.
@@ -92,19 +275,190 @@ class SequenceState(GameState):
             ps = self.AgentState(i)
             ps.hand = self.deck.deal(6)
             self.agents.append(ps)
+        #Hash of the position, with agent 0 to move. Kept up to date by SequenceGameRule.apply.
+        self.zobrist = ZobristHash(self)
+        #Sequences completed per team, and whether the game is over. Also kept up to date by SequenceGameRule.apply.
+        self.team_seqs = {RED:0, BLU:0}
+        self.terminal = False
+        
+    #A copy for search, far cheaper than copy.deepcopy: the board's lists and counts are copied one level deep, and
+    #cards, coordinates and actions, which are immutable, are shared. Agent traces start empty in the clone unless
+    #include_history is set. Attributes missing from an agent's copy of the state (e.g. deck.cards) stay missing.
+    def clone(self, include_history=False):
+        new = _Shallow(self)
+        new.deck = self.deck.clone()
+        new.board = self.board.clone()
+        new.agents = [plr_state.clone(include_history) for plr_state in self.agents]
+        new.team_seqs = dict(self.team_seqs)
+        return new
+
+
+#An action as an immutable, hashable value. It reads like the legacy action dict (action['type'], get(), keys(), dict()),
+#compares equal to the dict with the same entries, and is shared rather than duplicated when copied.
+class Action:
+    __slots__ = ('play_card', 'draft_card', 'type', 'coords')
+    KEYS = ('play_card', 'draft_card', 'type', 'coords')
+
+    def __init__(self, play_card, draft_card, type, coords):
+        object.__setattr__(self, 'play_card', play_card)
+        object.__setattr__(self, 'draft_card', draft_card)
+        object.__setattr__(self, 'type', type)
+        object.__setattr__(self, 'coords', coords)
+
+    #Converts a legacy action dict (e.g. one built by an agent, or read from an old replay).
+    @classmethod
+    def fromDict(cls, action):
+        if isinstance(action, Action):
+            return action
+        return cls(action['play_card'], action['draft_card'], action['type'], action['coords'])
+
+    def toDict(self):
+        return {'play_card':self.play_card, 'draft_card':self.draft_card, 'type':self.type, 'coords':self.coords}
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Action is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Action is immutable")
+
+    def __getitem__(self, key):
+        if key in Action.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in Action.KEYS else default
+
+    def keys(self):
+        return Action.KEYS
+
+    def values(self):
+        return (self.play_card, self.draft_card, self.type, self.coords)
+
+    def items(self):
+        return tuple(zip(Action.KEYS, self.values()))
+
+    def __iter__(self):
+        return iter(Action.KEYS)
+
+    def __len__(self):
+        return 4
+
+    def __contains__(self, key):
+        return key in Action.KEYS
+
+    def __eq__(self, other):
+        if isinstance(other, Action):
+            return self.values() == other.values()
+        if isinstance(other, dict):
+            return self.toDict() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (Action, self.values())
+
+
+#Legal actions kept in factorised form: every play option (card, type, coords) pairs with every draft card, followed
+#by any extra actions outside that product (the option to forego a trade). Iteration, indexing and len() see the same
+#sequence of Actions as the list from getLegalActions, but Actions are only built on demand, and membership is O(1).
+class ActionSpace:
+    def __init__(self, plays, drafts, extra=()):
+        self.plays  = plays
+        self.drafts = drafts
+        self.extra  = list(extra)
+        self._play_set  = set(plays)
+        self._draft_set = set(drafts)
+
+    def _action(self, play, draft):
+        card,act_type,coords = play
+        return Action(card, draft, act_type, coords)
+
+    def __len__(self):
+        return len(self.plays)*len(self.drafts) + len(self.extra)
+
+    def __iter__(self):
+        for play in self.plays:
+            for draft in self.drafts:
+                yield self._action(play, draft)
+        yield from self.extra
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(len(self))[idx]]
+        idx = range(len(self))[idx]
+        num_product = len(self.plays)*len(self.drafts)
+        if idx >= num_product:
+            return self.extra[idx-num_product]
+        return self._action(self.plays[idx//len(self.drafts)], self.drafts[idx%len(self.drafts)])
+
+    def __contains__(self, action):
+        try:
+            play  = (action['play_card'], action['type'], action['coords'])
+            draft = action['draft_card']
+            if play in self._play_set and draft in self._draft_set:
+                return action == self._action(play, draft)
+        except (TypeError, KeyError, IndexError): #Not shaped like an action at all.
+            return False
+        return action in self.extra
+
+    #Expands to the legacy list of actions, for agents that need a real list.
+    def toList(self):
+        return list(self)
+
+
+#Everything SequenceGameRule.undo needs to take back one action made with SequenceGameRule.apply.
+class UndoRecord:
+    __slots__ = ('agent_id', 'action', 'new_seq', 'last_action', 'trade', 'discard', 'card_idx', 'draft_idx', 'deck',
+                 'num_dealt', 'chips', 'empty_idx', 'plr_coords_idx', 'num_seq', 'num_orientations', 'reward', 'zobrist',
+                 'terminal', 'rng_state')
+
+    def __init__(self, agent_id, action, board, plr_state):
+        self.agent_id         = agent_id
+        self.action           = action
+        self.new_seq          = board.new_seq
+        self.last_action      = plr_state.last_action
+        self.trade            = plr_state.trade
+        self.discard          = plr_state.discard
+        self.card_idx         = None
+        self.draft_idx        = None
+        self.deck             = None #Order of deck.cards before the draft was replenished.
+        self.num_dealt        = 0
+        self.chips            = []   #(row, col, previous chip) for every cell changed, in the order changed.
+        self.empty_idx        = None
+        self.plr_coords_idx   = []   #Positions the placed coords were removed from in plr_coords, in the order removed.
+        self.num_seq          = 0
+        self.num_orientations = 0
+        self.reward           = 0
+        self.zobrist          = None
+        self.terminal         = False
+        self.rng_state        = None #State of the deck's RNG before dealing, if it has its own.
 
 
 #Implements game logic.
 class SequenceGameRule(GameRule):
-    def __init__(self,num_of_agent):
-        super().__init__(num_of_agent)
+    def __init__(self,num_of_agent, seed=None):
+        super().__init__(num_of_agent, seed)
         self.private_information = ["hand"] #Private information is a list of agent attributes that cannot be known between agents.
 
     def initialGameState(self):
-        return SequenceState(self.num_of_agent)
+        return SequenceState(self.num_of_agent, self.seed)
     
     #Returns a list of sequence coordinates if a sequence has just been formed. Else, returns None.
-    def checkSeq(self, chips, plr_state, last_coords):
+    #If the placing colour's window counts are given, only orientations with a fully owned window through the new chip
+    #are scanned, and the scan is skipped entirely when there are none (unless the heart of the board is complete).
+    def checkSeq(self, chips, plr_state, last_coords, window_counts=None):
         clr,sclr   = plr_state.colour, plr_state.seq_colour
         oc,os      = plr_state.opp_colour, plr_state.opp_seq_colour
         seq_type   = TRADSEQ
@@ -114,10 +468,6 @@ class SequenceGameRule(GameRule):
         nine_chip  = lambda x,clr : len(x)==9 and len(set(x))==1 and clr in x
         lr,lc      = last_coords
         
-        #All joker spaces become player chips for the purposes of sequence checking.
-        for r,c in COORDS['jk']:
-            chips[r][c] = clr
-        
         #First, check "heart of the board" (2h, 3h, 4h, 5h). If possessed by one team, the game is over.
         coord_list = [(4,4),(4,5),(5,4),(5,5)]
         heart_chips = [chips[y][x] for x,y in coord_list]
@@ -125,16 +475,26 @@ class SequenceGameRule(GameRule):
             seq_type = HOTBSEQ
             seq_found['hb']+=2
             seq_coords.append(coord_list)
+
+        #Only orientations holding a window of 5 owned cells through the new chip can contain a new sequence.
+        orientations = ['vr', 'hz', 'd1', 'd2']
+        if window_counts is not None:
+            orientations = {WINDOW_ORIENTATION[w] for w in CELL_WINDOWS[last_coords] if window_counts[w]==5}
+            if not orientations and not seq_found['hb']:
+                return (None,None)
             
         #Search vertical, horizontal, and both diagonals.
+        #All joker spaces count as player chips for the purposes of sequence checking.
         vr = [(-4,0),(-3,0),(-2,0),(-1,0),(0,0),(1,0),(2,0),(3,0),(4,0)]
         hz = [(0,-4),(0,-3),(0,-2),(0,-1),(0,0),(0,1),(0,2),(0,3),(0,4)]
         d1 = [(-4,-4),(-3,-3),(-2,-2),(-1,-1),(0,0),(1,1),(2,2),(3,3),(4,4)]
         d2 = [(-4,4),(-3,3),(-2,2),(-1,1),(0,0),(1,-1),(2,-2),(3,-3),(4,-4)]
         for seq,seq_name in [(vr,'vr'), (hz,'hz'), (d1,'d1'), (d2,'d2')]:
+            if seq_name not in orientations:
+                continue
             coord_list = [(r+lr, c+lc) for r,c in seq]
             coord_list = [i for i in coord_list if 0<=min(i) and 9>=max(i)] #Sequences must stay on the board.
-            chip_str   = ''.join([chips[r][c] for r,c in coord_list])
+            chip_str   = ''.join([chips[r][c] if chips[r][c]!=JOKER else clr for r,c in coord_list])
             #Check if there exists 4 player chips either side of new chip (counts as forming 2 sequences).
             if nine_chip(chip_str, clr):
                 seq_found[seq_name]+=2
@@ -164,18 +524,27 @@ class SequenceGameRule(GameRule):
                     if found:
                         break
         
-        for r,c in COORDS['jk']:
-            chips[r][c] = JOKER #Joker spaces reset after sequence checking.
-        
         num_seq = sum(seq_found.values())
         if num_seq > 1 and seq_type != HOTBSEQ:
             seq_type = MULTSEQ
         return ({'num_seq':num_seq, 'orientation':[k for k,v in seq_found.items() if v], 'coords':seq_coords}, seq_type) if num_seq else (None,None)
 
     def generateSuccessor(self, state, action, agent_id):
-        state.board.new_seq = False
-        print(f"agent id {agent_id}")
+        self.apply(state, action, agent_id)
+        return state
+    
+    
+    #Applies action to state in place and returns an UndoRecord with which undo() restores the state exactly.
+    #Search agents can use apply/undo pairs instead of copying states. On agents' copies of the state, where
+    #deck.cards is hidden, the draft is simply not replenished.
+    def apply(self, state, action, agent_id=None):
+        agent_id  = self.current_agent_index if agent_id is None else agent_id
+        board     = state.board
         plr_state = state.agents[agent_id]
+        record    = UndoRecord(agent_id, action, board, plr_state)
+        record.zobrist = state.zobrist
+        record.terminal = state.terminal
+        board.new_seq = False
         plr_state.last_action = action #Record last action such that other agents can make use of this information.
         reward = 0
                 
@@ -184,51 +553,140 @@ class SequenceGameRule(GameRule):
         card  = action['play_card']
         draft = action['draft_card']
         if card:
-            plr_state.hand.remove(card)                 #Remove card from hand.
+            record.card_idx = plr_state.hand.index(card)
+            del plr_state.hand[record.card_idx]         #Remove card from hand.
             plr_state.discard = card                    #Add card to discard pile.
             state.deck.discards.append(card)            #Add card to global list of discards (some agents might find tracking this helpful).
-            state.board.draft.remove(draft)             #Remove draft from draft selection.
+            record.draft_idx = board.draft.index(draft)
+            del board.draft[record.draft_idx]           #Remove draft from draft selection.
+            state.zobrist ^= ZOBRIST_DRAFT[draft][board.draft.count(draft)]
             plr_state.hand.append(draft)                #Add draft to player hand.
-            state.board.draft.extend(state.deck.deal()) #Replenish draft selection.
+            if hasattr(state.deck, 'cards'):
+                record.deck = list(state.deck.cards)    #Dealing shuffles the deck, so keep its order.
+                if getattr(state.deck, 'rng', None) is not None:
+                    record.rng_state = state.deck.rng.getstate()
+                dealt = state.deck.deal()
+                record.num_dealt = len(dealt)
+                for new_card in dealt:
+                    state.zobrist ^= ZOBRIST_DRAFT[new_card][board.draft.count(new_card)]
+                    board.draft.append(new_card)        #Replenish draft selection.
         
         #If action was to trade in a dead card, action is complete, and agent gets to play another card.
         if action['type']=='trade':
+            if not plr_state.trade:
+                state.zobrist ^= ZOBRIST_TRADE
             plr_state.trade = True #Switch trade flag to prohibit agent performing a second trade this turn.
-            return state
+            state.terminal = _Terminal(state)
+            return record
 
         #Update Sequence board. If action was to place/remove a marker, add/subtract it from the board.
         r,c = action['coords']
         if action['type']=='place':
-            state.board.chips[r][c] = plr_state.colour
-            state.board.empty_coords.remove(action['coords'])
-            state.board.plr_coords[plr_state.colour].append(action['coords'])            
+            record.chips.append((r,c,board.chips[r][c]))
+            state.zobrist ^= ZOBRIST_CHIPS[r][c][board.chips[r][c]] ^ ZOBRIST_CHIPS[r][c][plr_state.colour]
+            self._setChip(board, r, c, plr_state.colour)
+            record.empty_idx = board.empty_coords.index(action['coords'])
+            del board.empty_coords[record.empty_idx]
+            board.plr_coords[plr_state.colour].append(action['coords'])            
+            board.empty_counts[BOARD[r][c]] -= 1
+            UpdateWindowCounts(board, action['coords'], plr_state.colour, 1)
         elif action['type']=='remove':
-            state.board.chips[r][c] = EMPTY
-            state.board.empty_coords.append(action['coords'])
+            record.chips.append((r,c,board.chips[r][c]))
+            state.zobrist ^= ZOBRIST_CHIPS[r][c][board.chips[r][c]]
+            if board.chips[r][c] in [RED, BLU]:
+                UpdateWindowCounts(board, action['coords'], board.chips[r][c], -1)
+            self._setChip(board, r, c, EMPTY)
+            board.empty_coords.append(action['coords'])
+            board.empty_counts[BOARD[r][c]] += 1
         else:
             print("Action unrecognised.")
         
         #Check if a sequence has just been completed. If so, upgrade chips to special sequence chips.
         if action['type']=='place':
-            seq,seq_type = self.checkSeq(state.board.chips, plr_state, (r,c))
+            seq,seq_type = self.checkSeq(board.chips, plr_state, (r,c), board.window_counts[plr_state.colour])
             if seq:
                 reward += seq['num_seq']
-                state.board.new_seq = seq_type
+                board.new_seq = seq_type
                 for sequence in seq['coords']:
                     for r,c in sequence:
-                        if state.board.chips[r][c] != JOKER: #Joker spaces stay jokers.
-                            state.board.chips[r][c] = plr_state.seq_colour
-                            try:
-                                state.board.plr_coords[plr_state.colour].remove(action['coords'])
-                            except: #Chip coords were already removed with the first sequence.
-                                pass
+                        if board.chips[r][c] != JOKER: #Joker spaces stay jokers.
+                            record.chips.append((r,c,board.chips[r][c]))
+                            state.zobrist ^= ZOBRIST_CHIPS[r][c][board.chips[r][c]] ^ ZOBRIST_CHIPS[r][c][plr_state.seq_colour]
+                            self._setChip(board, r, c, plr_state.seq_colour)
+                            if action['coords'] in board.plr_coords[plr_state.colour]:
+                                idx = board.plr_coords[plr_state.colour].index(action['coords'])
+                                del board.plr_coords[plr_state.colour][idx]
+                                record.plr_coords_idx.append(idx)
                 plr_state.completed_seqs += seq['num_seq']
+                state.team_seqs[plr_state.colour] += seq['num_seq']
                 plr_state.seq_orientations.extend(seq['orientation'])
+                record.num_seq = seq['num_seq']
+                record.num_orientations = len(seq['orientation'])
         
+        if plr_state.trade:
+            state.zobrist ^= ZOBRIST_TRADE
         plr_state.trade = False #Reset trade flag if agent has completed a full turn.
+        state.zobrist ^= ZOBRIST_AGENT[agent_id] ^ ZOBRIST_AGENT[(agent_id+1) % len(state.agents)] #Next agent to move.
         plr_state.agent_trace.action_reward.append((action,reward)) #Log this turn's action and any resultant score.
         plr_state.score += reward
-        return state
+        record.reward = reward
+        state.terminal = _Terminal(state)
+        return record
+
+
+    #Reverses an action applied with apply(). Records must be undone in the reverse order they were applied in.
+    def undo(self, state, record):
+        board     = state.board
+        plr_state = state.agents[record.agent_id]
+        action    = record.action
+
+        if action['type']!='trade':
+            plr_state.score -= record.reward
+            plr_state.agent_trace.action_reward.pop()
+            if record.num_seq:
+                plr_state.completed_seqs -= record.num_seq
+                state.team_seqs[plr_state.colour] -= record.num_seq
+                del plr_state.seq_orientations[len(plr_state.seq_orientations)-record.num_orientations:]
+            for idx in reversed(record.plr_coords_idx):
+                board.plr_coords[plr_state.colour].insert(idx, action['coords'])
+            for r,c,chip in reversed(record.chips):
+                self._setChip(board, r, c, chip)
+            if action['type']=='place':
+                r,c = action['coords']
+                UpdateWindowCounts(board, action['coords'], plr_state.colour, -1)
+                board.plr_coords[plr_state.colour].pop()
+                board.empty_coords.insert(record.empty_idx, action['coords'])
+                board.empty_counts[BOARD[r][c]] += 1
+            elif action['type']=='remove':
+                r,c,chip = record.chips[0]
+                if chip in [RED, BLU]:
+                    UpdateWindowCounts(board, action['coords'], chip, 1)
+                board.empty_coords.pop()
+                board.empty_counts[BOARD[r][c]] -= 1
+        plr_state.trade = record.trade
+
+        if action['play_card']:
+            if record.deck is not None:
+                del board.draft[len(board.draft)-record.num_dealt:]
+                state.deck.cards[:] = record.deck
+                if record.rng_state is not None:
+                    state.deck.rng.setstate(record.rng_state)
+            plr_state.hand.pop()
+            board.draft.insert(record.draft_idx, action['draft_card'])
+            state.deck.discards.pop()
+            plr_state.discard = record.discard
+            plr_state.hand.insert(record.card_idx, action['play_card'])
+
+        plr_state.last_action = record.last_action
+        board.new_seq = record.new_seq
+        state.zobrist = record.zobrist
+        state.terminal = record.terminal
+
+
+    #Puts chip on cell (r,c) of board. Every chip apply() and undo() change goes through here, so that a rule playing on
+    #another kind of board only has to override this to keep its representation in step.
+    def _setChip(self, board, r, c, chip):
+        board.chips[r][c] = chip
     
     
     #Changes update() from template.py by keeping the current agent in play after trading a dead card.
@@ -241,10 +699,7 @@ class SequenceGameRule(GameRule):
 
 
     def gameEnds(self): #Game ends if a team has formed at least 2 sequences, or if the deck is empty.
-        scores = {RED:0, BLU:0}
-        for plr_state in self.current_game_state.agents:
-            scores[plr_state.colour] += plr_state.completed_seqs
-        return scores[RED]>=2 or scores[BLU]>=2 or len(self.current_game_state.board.draft)==0
+        return IsTerminal(self.current_game_state)
 
 
     def calScore(self, game_state,agent_id):
@@ -252,48 +707,51 @@ class SequenceGameRule(GameRule):
 
 
     def getLegalActions(self, game_state, agent_id):
-        actions = []
+        return list(self.getActionSpace(game_state, agent_id))
+
+
+    #Yields the actions of getLegalActions one at a time, in the same order, without building the list first.
+    #Agents that stop at the first acceptable action, or only score actions as they stream past, can use this instead.
+    def iterLegalActions(self, game_state, agent_id):
+        yield from self.getActionSpace(game_state, agent_id)
+
+
+    #Legal actions in factorised form. Each play option pairs with every draft card, in the order getLegalActions lists.
+    def getActionSpace(self, game_state, agent_id):
+        plays = []
         agent_state = game_state.agents[agent_id]
+        draft = list(game_state.board.draft)
         
         #First, give the agent the option to trade a dead card, if they haven't just done so.
         if not agent_state.trade:
             for card in agent_state.hand:
-                if card[0]!='j':
-                    free_spaces = 0
-                    for r,c in COORDS[card]:
-                        if game_state.board.chips[r][c]==EMPTY:
-                            free_spaces+=1
-                    if not free_spaces: #No option to place, so card is considered dead and can be traded.
-                        for draft in game_state.board.draft:
-                            actions.append({'play_card':card, 'draft_card':draft, 'type':'trade', 'coords':None})
+                if IsDeadCard(game_state, card): #No option to place, so card is considered dead and can be traded.
+                    plays.append((card, 'trade', None))
                         
-            if len(actions): #If trade actions available, return those, along with the option to forego the trade.
-                actions.append({'play_card':None, 'draft_card':None, 'type':'trade', 'coords':None})
-                return actions
+            if len(plays) and len(draft): #If trade actions available, return those, along with the option to forego the trade.
+                return ActionSpace(plays, draft, [Action(None, None, 'trade', None)])
+            plays = []
                 
         #If trade is prohibited, or no trades available, add action/s for each card in player's hand.
-        #For each action, add copies corresponding to the various draft cards that could be selected at end of turn.
+        #Each of these is paired with the various draft cards that could be selected at end of turn.
         for card in agent_state.hand:
             if card in ['jd','jc']: #two-eyed jacks
                 for r in range(10):
                     for c in range(10):
                         if game_state.board.chips[r][c]==EMPTY:
-                            for draft in game_state.board.draft:
-                                actions.append({'play_card':card, 'draft_card':draft, 'type':'place', 'coords':(r,c)})
+                            plays.append((card, 'place', (r,c)))
                             
             elif card in ['jh','js']: #one-eyed jacks
                 for r in range(10):
                     for c in range(10):
                         if game_state.board.chips[r][c]==agent_state.opp_colour:
-                            for draft in game_state.board.draft:
-                                actions.append({'play_card':card, 'draft_card':draft, 'type':'remove', 'coords':(r,c)})
+                            plays.append((card, 'remove', (r,c)))
             
             else: #regular cards
                 for r,c in COORDS[card]:
                     if game_state.board.chips[r][c]==EMPTY:
-                        for draft in game_state.board.draft:
-                            actions.append({'play_card':card, 'draft_card':draft, 'type':'place', 'coords':(r,c)})
+                        plays.append((card, 'place', (r,c)))
                     
-        return actions
+        return ActionSpace(plays, draft)
 
 # END FILE -----------------------------------------------------------------------------------------------------------#
\ No newline at end of file
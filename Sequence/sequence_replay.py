@@ -0,0 +1,131 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Compact binary replay format for "Sequence". A replay is a short header (magic, version, JSON metadata)
+#          followed by one small record per turn, appended while the game is played.
+#
+#          Layout, all integers big-endian:
+#            header   MAGIC, version (1 byte), metadata length (4 bytes), metadata (UTF-8 JSON)
+#            action   b'A', agent id, type, play card, draft card, coords            (6 bytes)
+#            warning  b'W', agent id, move index (4 bytes)                           (6 bytes)
+#            end      b'E', length (4 bytes), UTF-8 JSON of the scores
+#          Cards are indices into CARDS, coords are r*10+c, and NONE (255) stands for None.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import json
+import struct
+import pickle
+from Sequence.sequence_model import Action, CARDS
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+MAGIC   = b'SQRP'
+VERSION = 1
+NONE    = 255
+
+ACTION_TYPES = ['place', 'remove', 'trade']
+TYPE_INDEX   = {t:i for i,t in enumerate(ACTION_TYPES)}
+CARD_INDEX   = {card:i for i,card in enumerate(CARDS)}
+
+ACTION_RECORD  = struct.Struct('>cBBBBB')
+WARNING_RECORD = struct.Struct('>cBI')
+LENGTH         = struct.Struct('>I')
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+def EncodeAction(agent_id, action):
+    coords = action['coords']
+    return ACTION_RECORD.pack(b'A', agent_id, TYPE_INDEX[action['type']],
+                              NONE if action['play_card']  is None else CARD_INDEX[action['play_card']],
+                              NONE if action['draft_card'] is None else CARD_INDEX[action['draft_card']],
+                              NONE if coords is None else coords[0]*10+coords[1])
+
+def DecodeAction(record):
+    _,agent_id,act_type,play_card,draft_card,coords = ACTION_RECORD.unpack(record)
+    return agent_id, Action(None if play_card  == NONE else CARDS[play_card],
+                            None if draft_card == NONE else CARDS[draft_card],
+                            ACTION_TYPES[act_type],
+                            None if coords == NONE else divmod(coords, 10))
+
+def IsBinaryReplay(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+#Reads the header of an open binary replay, leaving the file positioned at the first record.
+def ReadHeader(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a binary Sequence replay")
+    version = f.read(1)[0]
+    if version > VERSION:
+        raise ValueError(f"replay format version {version} is newer than supported version {VERSION}")
+    length, = LENGTH.unpack(f.read(LENGTH.size))
+    return json.loads(f.read(length).decode('utf-8'))
+
+#Yields ('action', agent_id, action), ('warning', agent_id, move_index) and ('end', scores) records in file order,
+#reading the file as it goes. A replay cut short (e.g. a crashed game) simply ends without an 'end' record.
+def ReadRecords(f):
+    while True:
+        tag = f.read(1)
+        if tag == b'A':
+            rest = f.read(ACTION_RECORD.size-1)
+            if len(rest) < ACTION_RECORD.size-1:
+                return
+            yield ('action',) + DecodeAction(tag+rest)
+        elif tag == b'W':
+            rest = f.read(WARNING_RECORD.size-1)
+            if len(rest) < WARNING_RECORD.size-1:
+                return
+            _,agent_id,move = WARNING_RECORD.unpack(tag+rest)
+            yield ('warning', agent_id, move)
+        elif tag == b'E':
+            length, = LENGTH.unpack(f.read(LENGTH.size))
+            yield ('end', {int(i):score for i,score in json.loads(f.read(length).decode('utf-8')).items()})
+        else:
+            return
+
+#Loads a replay in either format, returning the history dict that Game.Run produces and GameReplayer plays.
+def LoadReplay(path):
+    if not IsBinaryReplay(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f, encoding="bytes")
+
+    with open(path, 'rb') as f:
+        replay = ReadHeader(f)
+        replay.update({"actions":[], "warning_positions":[], "scores":{}})
+        for record in ReadRecords(f):
+            if record[0] == 'action':
+                replay["actions"].append({len(replay["actions"]):{"agent_id":record[1], "action":record[2]}})
+            elif record[0] == 'warning':
+                replay["warning_positions"].append((record[1], record[2]))
+            else:
+                replay["scores"] = record[1]
+    return replay
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#Streams a game to a binary replay file. The header is written on creation, and every record is flushed as soon as it
+#is written, so a replay of an unfinished game can already be read.
+class ReplayWriter:
+    def __init__(self, path, metadata):
+        self.file = open(path, 'wb')
+        data = json.dumps(metadata).encode('utf-8')
+        self.file.write(MAGIC + bytes([VERSION]) + LENGTH.pack(len(data)) + data)
+        self.file.flush()
+
+    def writeAction(self, agent_id, action):
+        self.file.write(EncodeAction(agent_id, action))
+        self.file.flush()
+
+    def writeWarning(self, agent_id, move_index):
+        self.file.write(WARNING_RECORD.pack(b'W', agent_id, move_index))
+        self.file.flush()
+
+    def close(self, scores=None):
+        if scores is not None:
+            data = json.dumps({str(i):score for i,score in scores.items()}).encode('utf-8')
+            self.file.write(b'E' + LENGTH.pack(len(data)) + data)
+        self.file.close()
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
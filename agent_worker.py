@@ -0,0 +1,290 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Runs an agent in a long-lived worker process. The referee sends each observation over a pipe, enforces the
+#          time limit itself, and kills the worker as soon as it overruns the limit by more than a grace period, so it
+#          cannot go on using the CPU during the other agents' turns. The worker is restarted for its next request.
+#          A worker can be handed the agent for the next game, so a run of games needs one process per agent only.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import io
+import os
+import gc
+import sys
+import pickle
+import time
+import threading
+import traceback
+import types
+import multiprocessing
+from   multiprocessing import reduction
+from   func_timeout import FunctionTimedOut
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+_NOT_PLAIN  = (type, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.ModuleType)
+_redirected = None #In a worker, the stdout it was last sent by NewGame.
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Pickles a request for the worker. Attributes hidden by `hidden` (nested as for observation.ObservationView) are
+#left out while pickling, so the master state is encoded directly without a private copy being made first.
+#`as_list` asks the worker to expand a factorised action space into the list of actions the agent expects. `info`
+#holds the attributes set on the agent before it is called (its deadline and warnings left).
+def EncodeRequest(move, actions, game_state, hidden=None, as_list=False, info=None):
+    buffer = io.BytesIO()
+    _HidingPickler(buffer, _HiddenObjects(game_state, hidden or {}, {})).dump((move, actions, game_state, as_list,
+                                                                                info or {}))
+    return buffer.getvalue()
+
+#Maps id(object) -> (object, names of its hidden attributes). The object is kept so its id stays valid.
+def _HiddenObjects(target, spec, found):
+    for key,sub in spec.items():
+        if sub is True:
+            found.setdefault(id(target), (target, set()))[1].add(key)
+        elif isinstance(target, (list, dict)):
+            _HiddenObjects(target[key], sub, found)
+        else:
+            _HiddenObjects(getattr(target, key), sub, found)
+    return found
+
+def _Rebuild(cls, attrs):
+    obj = cls.__new__(cls)
+    obj.__dict__.update(attrs)
+    return obj
+
+#True for instances whose pickled form is just their __dict__, which _Rebuild can restore on its own.
+def _IsPlainObject(obj):
+    cls = type(obj)
+    return (hasattr(obj, '__dict__') and not isinstance(obj, _NOT_PLAIN)
+            and cls.__reduce_ex__ is object.__reduce_ex__ and cls.__reduce__ is object.__reduce__
+            and getattr(cls, '__getstate__', None) is getattr(object, '__getstate__', None)
+            and not hasattr(cls, '__setstate__') and not hasattr(cls, '__slots__'))
+
+def _Pack(value):
+    if type(value) is list and value:
+        first = value[0]
+        if type(first) is str:
+            if all(type(x) is str and len(x) == 1 for x in value):
+                return _Packed(''.join(value))
+        elif type(first) is int:
+            if all(type(x) is int and 0 <= x < 256 for x in value):
+                return _Packed(bytes(value))
+        elif type(first) is list:
+            return [_Pack(x) for x in value]
+    elif type(value) is dict:
+        return {k:_Pack(v) for k,v in value.items()}
+    return value
+
+#The descriptor behind the referee's stdout, or None if it has none (e.g. while pytest captures output).
+def _StdoutFd():
+    try:
+        sys.stdout.flush()
+        return sys.stdout.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return None
+
+#Points the worker's stdout and stderr at the descriptor it was sent, as they would be in a worker forked just now.
+def _Redirect(fd):
+    global _redirected
+    if _redirected is not None:
+        _redirected.close()
+    _redirected = sys.stdout = sys.stderr = os.fdopen(fd, 'w', buffering=1)
+
+#The worker's main loop. A request holds a move index. Without one, the message either hands over the agent for the
+#next game, or (with no agent either) tells the worker to stop. It also stops if the pipe closes.
+def _WorkerLoop(conn, agent):
+    while True:
+        try:
+            message = pickle.loads(conn.recv_bytes())
+        except EOFError:
+            break
+        if message[0] is None:
+            _,new_agent,has_stdout = message
+            if new_agent is None:
+                break
+            agent = new_agent
+            if has_stdout:
+                _Redirect(reduction.recv_handle(conn))
+            continue
+        move, actions, game_state, as_list, info = message
+        if as_list:
+            actions = list(actions)
+        for name,value in info.items():
+            setattr(agent, name, value)
+        #The process runs nothing but the agent, so everything it holds before the move can be frozen: the collector's
+        #full collections, the longest pauses a search sees, then only go through what SelectAction creates.
+        gc.freeze()
+        try:
+            reply = (move, True, agent.SelectAction(actions, game_state))
+        except Exception as e:
+            e.worker_traceback = traceback.format_exc()
+            reply = (move, False, e)
+        gc.unfreeze()
+        try:
+            data = pickle.dumps(reply, pickle.HIGHEST_PROTOCOL)
+        except Exception: #The action or exception could not be pickled, so report that instead.
+            data = pickle.dumps((move, False, RuntimeError(f"unpicklable reply from SelectAction(): {reply[2]!r}")),
+                                pickle.HIGHEST_PROTOCOL)
+        sys.stdout.flush()
+        conn.send_bytes(data)
+    conn.close()
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#Stands in for a list of single characters or of small ints while pickling: list() turns the string or bytes it holds
+#back into the list.
+class _Packed:
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce__(self):
+        return list, (self.data,)
+
+
+#Pickles plain objects attribute by attribute, leaving out hidden attributes and packing the lists of chips and of
+#window counts that make up most of a board (the pickler never hands lists to reducer_override themselves).
+class _HidingPickler(pickle.Pickler):
+    def __init__(self, file, hidden):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.hidden = hidden
+
+    def reducer_override(self, obj):
+        if not _IsPlainObject(obj):
+            return NotImplemented
+        entry = self.hidden.get(id(obj))
+        hidden = entry[1] if entry is not None and entry[0] is obj else ()
+        return _Rebuild, (type(obj), {k:_Pack(v) for k,v in obj.__dict__.items() if k not in hidden})
+
+
+#Parent-side handle on one agent's worker process. The agent object given here is never run in this process, so a
+#restarted worker starts again from the agent as it was handed over for the current game.
+class AgentWorker:
+    def __init__(self, agent, grace=1.0):
+        self.agent    = agent
+        self.grace    = grace #Seconds past the time limit a worker may run before it is killed and restarted.
+        self.restarts = 0
+        self.pending  = None  #Move index of a request the worker has not answered yet.
+        self.hard_deadline = None
+        self.timer    = None  #Kills the worker at hard_deadline if a timed-out request is still unanswered then.
+        self.process  = None
+        self.conn     = None
+        self._Start()
+
+    def _Start(self):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self.conn,child = context.Pipe()
+        self.process = context.Process(target=_WorkerLoop, args=(child, self.agent), daemon=True)
+        self.process.start()
+        child.close()
+        self.pending = None
+
+    def _Stop(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def Restart(self):
+        self._Stop()
+        self.restarts += 1
+        self._Start()
+
+    #Hands the worker the agent for a new game, together with the referee's current stdout, so that the agent's output
+    #goes wherever a worker started for this game would have sent it.
+    def NewGame(self, agent):
+        self._Settle()
+        self.agent = agent
+        fd = _StdoutFd()
+        try:
+            self.conn.send_bytes(pickle.dumps((None, agent, fd is not None), pickle.HIGHEST_PROTOCOL))
+            if fd is not None:
+                reduction.send_handle(self.conn, fd, self.process.pid)
+        except Exception: #An agent that cannot be pickled, or a worker that has gone, gets a fresh worker instead.
+            self._Stop()
+            self._Start()
+
+    #Run on the timer's thread once the grace period is over. The parent is not using the pipe meanwhile: every other
+    #method stops the timer before touching it. A worker that was killed is restarted by _Settle on its next request.
+    def _Expire(self):
+        if self.pending is not None and not self.conn.poll(0):
+            self.process.kill()
+
+    def _StopTimer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer.join()
+            self.timer = None
+
+    #Waits for the answer to a request that already timed out, as the worker cannot take a new one before then.
+    def _Settle(self):
+        self._StopTimer()
+        while self.pending is not None:
+            remaining = None if self.hard_deadline is None else max(0, self.hard_deadline - time.monotonic())
+            if not self.conn.poll(remaining): #A reply that came in before the worker was due to be killed still counts.
+                self.Restart()
+                return
+            try:
+                move,_,_ = pickle.loads(self.conn.recv_bytes())
+            except EOFError:
+                self.Restart()
+                return
+            if move == self.pending:
+                self.pending = None
+
+    #Same contract as func_timeout around agent.SelectAction: returns the action, re-raises the agent's exception, or
+    #raises FunctionTimedOut once time_limit seconds (None for no limit) have passed. The agent is given the same
+    #deadline; time.monotonic() is system-wide, so it means the same in the worker.
+    def SelectAction(self, actions, game_state, time_limit, move, hidden=None, as_list=False, warnings_left=None):
+        self._Settle()
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        request = EncodeRequest(move, actions, game_state, hidden, as_list,
+                                {"deadline":deadline, "warnings_left":warnings_left})
+        try:
+            self.conn.send_bytes(request)
+        except (BrokenPipeError, EOFError, OSError):
+            self.Restart()
+            self.conn.send_bytes(request)
+        self.pending = move
+        self.hard_deadline = None if deadline is None else deadline + self.grace
+
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self.conn.poll(remaining):
+                self.timer = threading.Timer(max(0, self.hard_deadline - time.monotonic()), self._Expire)
+                self.timer.daemon = True
+                self.timer.start()
+                raise FunctionTimedOut(f"SelectAction() did not return within {time_limit} seconds", time_limit)
+            try:
+                reply_move,ok,value = pickle.loads(self.conn.recv_bytes())
+            except EOFError:
+                self.Restart()
+                raise RuntimeError("agent worker process exited during SelectAction()")
+            if reply_move != move:
+                continue
+            self.pending = None
+            if ok:
+                return value
+            raise value
+
+    def Close(self):
+        if self.process is None:
+            return
+        self._StopTimer()
+        if self.pending is None:
+            try:
+                self.conn.send_bytes(pickle.dumps((None, None, False)))
+            except OSError:
+                pass
+            self.process.join(self.grace)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
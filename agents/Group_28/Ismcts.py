@@ -0,0 +1,215 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Implementing information-set MCTS in agent of the Sequence Game. Every iteration deals the cards the agent
+#          cannot see (the other agents' hands and the deck) at random, consistent with the discards, the draft and
+#          the other agents' action history, and plays that determinisation out on one tree shared by all of them.
+#          The tree's nodes are the agent's information sets: children are keyed by action, for every agent, and a
+#          child only takes part in selection in the determinisations where its action is legal.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+import math
+import random
+from collections import Counter
+
+from template import Agent, TimeManager
+from Sequence.sequence_model import SequenceGameRule, SampleLegalAction, IsTerminal, TeamScore, BOARD, CARDS, WINDOWS
+from Sequence.sequence_utils import *
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+C_P = 0.7          # exploration constant of UCB
+ROLLOUT_DEPTH = 8  # random moves played after leaving the tree, before the position is scored
+# corners in each 5-in-a-row window, which count for both colours
+WINDOW_CORNERS = [sum(BOARD[r][c] == 'jk' for r, c in cells) for cells in WINDOWS]
+
+
+class myAgent(Agent):
+    def __init__(self, _id):
+        super().__init__(_id)
+        self.rule = None
+
+    def SelectAction(self, actions, game_state):
+        # search until just before the deadline the game gave this move
+        time_manager = TimeManager(self.deadline)
+        if self.rule is None:
+            self.rule = SequenceGameRule(len(game_state.agents))
+        thisIsmcts = ISMCTS(self.rule, game_state, self.id)
+        thisIsmcts.ismcts(time_manager)
+        best_action = thisIsmcts.findBest_action()
+        for action in actions:
+            if action == best_action:
+                return action
+        return random.choice(actions)
+
+
+class Node:
+    __slots__ = ('children', 'visits', 'value', 'avail', 'colour')
+
+    def __init__(self, colour=None):
+        self.children = {}
+        self.visits = 0
+        # sum of the rewards of colour, the team whose action leads to this node
+        self.value = 0.0
+        # number of iterations in which that action was legal
+        self.avail = 0
+        self.colour = colour
+    """
+    UCB with availability counts instead of the parent's visits
+    """
+    def calcuate_UCB(self):
+        return self.value / self.visits + C_P * math.sqrt(math.log(self.avail) / self.visits)
+
+
+class ISMCTS(object):
+    def __init__(self, rule, game_state, agent_id):
+        self._rule = rule
+        self._agent_id = agent_id
+        self._num_agents = len(game_state.agents)
+        self._hand_size = len(game_state.agents[agent_id].hand)
+        self._root = Node()
+        # the cards known to be in the other agents' hands, and the unseen cards left to deal
+        self._known, self._unseen = unseenCards(game_state, agent_id, self._hand_size)
+        # one working copy, dealt again before every iteration and restored with undo after it
+        self._state = game_state.clone()
+        self._state.deck.rng = None
+        self._root_actions = rule.getLegalActions(self._state, agent_id)
+
+    def ismcts(self, time_manager):
+        # one determinisation and iteration per loop, for as long as the time manager allows
+        while time_manager.keepGoing() and len(self._root_actions) > 0:
+            self.determinise()
+            self.iterate()
+        return self._root
+    """
+    deal the unseen cards: the other agents get the cards known to be in their hands,
+    filled up at random, and the rest is the deck
+    """
+    def determinise(self):
+        cards = list(self._unseen)
+        random.shuffle(cards)
+        for agent_id, known in self._known.items():
+            needed = self._hand_size - len(known)
+            self._state.agents[agent_id].hand = known + cards[:needed]
+            del cards[:needed]
+        self._state.deck.cards = cards
+    """
+    select and expand in the tree, play out at random, score and backpropagate,
+    then undo every move so the state is back at the root
+    """
+    def iterate(self):
+        rule = self._rule
+        state = self._state
+        agent_id = self._agent_id
+        node = self._root
+        path = []
+        records = []
+        actions = self._root_actions
+        while not IsTerminal(state) and len(actions) > 0:
+            untried = []
+            for action in actions:
+                child = node.children.get(action)
+                if child is None:
+                    untried.append(action)
+                else:
+                    child.avail += 1
+            if len(untried) > 0:
+                action = random.choice(untried)
+                child = Node(state.agents[agent_id].colour)
+                child.avail = 1
+                node.children[action] = child
+            else:
+                action = max(actions, key=lambda a: node.children[a].calcuate_UCB())
+                child = node.children[action]
+            records.append(rule.apply(state, action, agent_id))
+            agent_id = self.nextAgent(agent_id, action)
+            node = child
+            path.append(node)
+            if len(untried) > 0:
+                break
+            actions = rule.getLegalActions(state, agent_id)
+
+        depth = 0
+        while depth < ROLLOUT_DEPTH and not IsTerminal(state):
+            action = SampleLegalAction(state, agent_id)
+            if action is None:
+                break
+            records.append(rule.apply(state, action, agent_id))
+            agent_id = self.nextAgent(agent_id, action)
+            depth += 1
+
+        reward = calReward(state)
+        for record in reversed(records):
+            rule.undo(state, record)
+        for node in path:
+            node.visits += 1
+            node.value += reward if node.colour == RED else 1 - reward
+    """
+    agent to move after action, trading a dead card does not end the turn
+    """
+    def nextAgent(self, agent_id, action):
+        if action['type'] == 'trade':
+            return agent_id
+        return (agent_id + 1) % self._num_agents
+    """
+    return the most visited action at the root
+    """
+    def findBest_action(self):
+        best_action = None
+        best_visits = 0
+        for action, child in self._root.children.items():
+            if child.visits > best_visits:
+                best_action = action
+                best_visits = child.visits
+        return best_action
+
+"""
+the cards agent_id has not seen, split into the cards known to be in each other agent's hand
+(drafted by them and not played since, according to their action history), and the rest
+"""
+def unseenCards(game_state, agent_id, hand_size):
+    unseen = Counter(CARDS * 2)
+    unseen.subtract(game_state.agents[agent_id].hand)
+    unseen.subtract(game_state.board.draft)
+    unseen.subtract(game_state.deck.discards)
+    known = {}
+    for other in range(len(game_state.agents)):
+        if other == agent_id:
+            continue
+        cards = []
+        for action, _ in game_state.agents[other].agent_trace.action_reward:
+            if action['play_card'] in cards:
+                cards.remove(action['play_card'])
+            cards.append(action['draft_card'])
+        # trades are not in the history, so a traded card can still be listed: keep the latest cards still unseen
+        known[other] = []
+        for card in reversed(cards):
+            if len(known[other]) < hand_size and unseen[card] > 0:
+                unseen[card] -= 1
+                known[other].append(card)
+    return known, list(unseen.elements())
+
+"""
+reward of the red team for a simulated state, between 0 and 1: the result once the game is over,
+otherwise the difference in sequences, with the fullest open window counting as a part of one
+"""
+def calReward(state):
+    red = TeamScore(state, RED)
+    blue = TeamScore(state, BLU)
+    if IsTerminal(state):
+        return 1.0 if red > blue else 0.0 if blue > red else 0.5
+    counts = state.board.window_counts
+    red += openWindow(counts[RED], counts[BLU]) / 5
+    blue += openWindow(counts[BLU], counts[RED]) / 5
+    return 0.5 + 0.5 * math.tanh(red - blue)
+
+"""
+most cells owned in a window that is not full and holds none of the opponent's chips
+"""
+def openWindow(own_counts, opp_counts):
+    best = 0
+    for own, opp, corners in zip(own_counts, opp_counts, WINDOW_CORNERS):
+        if opp == corners and best < own < 5:
+            best = own
+    return best
@@ -7,9 +7,9 @@
 # IMPORTS ------------------------------------------------------------------------------------------------------------#
 import copy
 import math
-import time
 
-from template import Agent
+from template import Agent, TimeManager
+from agents.Group_28.mctsTree import NodeStore, RootParallel, ROOT
 import random
 from Sequence.sequence_model import BOARD, COORDS
 from Sequence.sequence_utils import *
@@ -18,155 +18,219 @@ from Sequence.sequence_utils import *
 class myAgent(Agent):
     def __init__(self, _id):
         super().__init__(_id)
+        # worker processes for searches with more than one process (search_workers)
+        self.parallel = RootParallel()
+        # last turn's tree and the node of the action played, searched on next turn if the game went as it expects
+        self.tree = None
 
     def SelectAction(self, actions, game_state):
+        # search until just before the deadline the game gave this move
+        time_manager = TimeManager(self.deadline, budget=0.7)
         trade = False
         for action in actions:
             if action['type'] == 'trade':
                 trade = True
                 break
         if trade:
+            self.tree = None
             return random.choice(actions)
         else:
-            timeleft = 0.7
             color = game_state.agents[self.id].colour
             thisMcts = MCTS(actions, game_state, color)
-            root_Node = thisMcts.mcts(timeleft)
-            bestChild = root_Node.findBest_child()
-            choice_action = bestChild._last_action
+            tree = thisMcts.parallelMcts(time_manager, self.parallel, self.search_workers,
+                                         self.reusableTree(game_state))
+            bestChild = thisMcts.findBest_child()
+            if bestChild is None:
+                return random.choice(actions)
+            self.tree = (tree, bestChild)
+            choice_action = thisMcts.lastAction(bestChild)
             return choice_action
 
+    """
+    return the tree kept from last turn if the board is the one it leads to:
+    its action was played, then the other agents played their last_action,
+    otherwise None
+    """
+    def reusableTree(self, game_state):
+        if self.tree is None:
+            return None
+        tree, node = self.tree
+        self.tree = None
+        if game_state.agents[self.id].last_action != tree.root_state[1][tree.action[node]]:
+            return None
+        # states are kept by the tree, so the other agents' moves are played on a copy
+        chips = copy.deepcopy(tree.state(node)[0])
+        num_agents = len(game_state.agents)
+        for i in range(1, num_agents):
+            agent = game_state.agents[(self.id + i) % num_agents]
+            action = agent.last_action
+            if action is None:
+                return None
+            if action['type'] == 'place':
+                x, y = action['coords']
+                chips[x][y] = agent.colour
+            elif action['type'] == 'remove':
+                x, y = action['coords']
+                chips[x][y] = EMPTY
+        # the tree does not mark sequences, so sequence chips count as their colour
+        if teamChips(chips) != teamChips(game_state.board.chips):
+            return None
+        return tree, node
 
-class Node:
-    def __init__(self, game_state, drafts, actions, player_color, discountFactor = 0.9,last_action=None, parent=None):
-        self._game_state = game_state
-        self._drafts = drafts
+
+class MCTS(object):
+    def __init__(self, actions, game_state, player_color, discountFactor=0.9, maxDepth=6):
         self._actions = actions
+        self._game_state = game_state
         self._player_color = player_color
         self._discountFactor = discountFactor
-        self._parent = parent
-        self._last_action = last_action
-        # initial visits to 1, avoid divide by zero
-        self._children = []
-        self._visits = 1
-        self._value_Q = 0.0
+        self._maxDepth = maxDepth
+        self._tree = None
+        # last turn's tree, and for nodes not expanded yet the same node in it, whose children are matched up
+        # when they are expanded
+        self._old_tree = None
+        self._reuse = {}
+
+    def mcts(self, time_manager, reuse=None, root_state=None):
+        if root_state is None:
+            root_state = self.rootState()
+        current_chips_board, current_actions, current_drafts = root_state
+
+        # only the root keeps its state, the other nodes' states are recomputed from it
+        self._tree = NodeStore(root_state, self.nextState)
+        # start from the statistics of last turn's search, if it led here
+        if reuse is not None:
+            self._old_tree, old_node = reuse
+            self.graft(ROOT, old_node)
+        # the root is expanded before the first time check, so there is a child to choose however little time is left
+        if len(current_actions)>0 and len(current_drafts)>0:
+            self.expand(ROOT, root_state)
+        # one iteration per loop, for as long as the time manager allows
+        while time_manager.keepGoing() and len(current_actions)>0 and len(current_drafts)>0:
+            # select least visited sub node in root's children, expand it if it is not expended
+            selected_Node, last_action, state = self.select()
+            reward = calReward(last_action, current_chips_board, self._player_color)
+            if time_manager.expired():
+                break
+            # if selected_Node is not backPropagated, simulate it and do backPropagate
+            reward += self.simulate(state, time_manager)
+            if time_manager.expired():
+                break
+            self.backPropagate(selected_Node, reward)
+
+        self._old_tree = None
+        self._reuse = {}
+        return self._tree
     """
-    return the q value of this node
+    search with workers processes (root parallelism): the searches in the other
+    processes start from the same root, and their statistics for the root's
+    children are added to this tree
     """
-    def getValue(self):
-        return self._value_Q
-
+    def parallelMcts(self, time_manager, parallel, workers, reuse=None):
+        root_state = self.rootState()
+        pending = parallel.start(searchRoot, (root_state, self._player_color), time_manager, workers)
+        tree = self.mcts(time_manager, reuse, root_state)
+        for stats in parallel.collect(pending, time_manager):
+            tree.mergeRoot(stats)
+        return tree
     """
-    if not expanded, expand and return random child,
-    if expanded, return least visited child
+    board chips, actions and drafts of the root, copied from the game state
+    """
+    def rootState(self):
+        return (copy.deepcopy(self._game_state.board.chips), copy.deepcopy(self._actions),
+                copy.deepcopy(self._game_state.board.draft))
+    """
+    state reached from state by its action at index action
+    """
+    def nextState(self, state, action):
+        chips, actions, drafts = state
+        return generateNextState(chips, actions[action], actions, drafts, self._player_color)
+    """
+    action that leads to node
+    """
+    def lastAction(self, node):
+        tree = self._tree
+        return tree.state(tree.parent[node])[1][tree.action[node]]
+    """
+    go down least visited children from the root, computing their states on the way,
+    if a node is not expanded, expand it and return a random child,
+    return the node, the action leading to it and its state
     """
-
     def select(self):
-        if len(self._actions) > 0 and len(self._drafts) > 0:
-            if len(self._children) == 0:
-                self.expand()
-                return random.choice(self._children)
+        tree = self._tree
+        node, last_action, state = ROOT, None, tree.root_state
+        while len(state[1]) > 0 and len(state[2]) > 0:
+            expanding = tree.num_children[node] == 0
+            if expanding:
+                self.expand(node, state)
+                child = random.choice(tree.children(node))
             else:
-                least_nodes = self._children[0]
-                for child in self._children:
-                    if child._visits < least_nodes._visits:
-                        least_nodes = child
-                least_nodes = least_nodes.select()
-            return least_nodes
-        else:
-            return self
+                child = tree.leastVisited(node)
+            last_action = state[1][tree.action[child]]
+            node, state = child, self.nextState(state, tree.action[child])
+            if expanding:
+                break
+        return node, last_action, state
     """
-    add all children
+    add all children, with the statistics of the same children in last turn's tree
     """
-    def expand(self):
-        current_game_state = copy.deepcopy(self._game_state)
-        current_player_color = self._player_color
-        current_actions = copy.deepcopy(self._actions)
-        current_drafts = copy.deepcopy(self._drafts)
-        if len(current_drafts) > 0:
-            limit = 0
-            for action in current_actions:
-                if limit > 30:
-                    break
-                newState, newActions, newDraft = generateNextState(current_game_state, action, current_actions,
-                                                                   current_drafts, current_player_color)
-                self._children.append(
-                    Node(newState, newDraft, newActions, current_player_color, last_action=action, parent=self))
-                limit += 1
+    def expand(self, node, state):
+        chips, actions, drafts = state
+        limit = min(len(actions), 31) if len(drafts) > 0 else 0
+        children = self._tree.expand(node, limit)
+        old_node = self._reuse.pop(node, None)
+        if old_node is not None:
+            old_tree = self._old_tree
+            old_actions = old_tree.state(old_node)[1]
+            old_children = {actionKey(old_actions[old_tree.action[child]]): child
+                            for child in old_tree.children(old_node)}
+            for child in children:
+                self.graft(child, old_children.get(actionKey(actions[self._tree.action[child]])))
+        return children
     """
-    backPropagation
+    carry over the statistics of the same node in last turn's tree
     """
-    def backPropagate(self, reward):
-        self._visits += 1
-        self._value_Q = self._value_Q + ((reward - self._value_Q) / self._visits)
-        if self._parent is None:
+    def graft(self, node, old_node):
+        if old_node is None:
             return
-        self._parent.backPropagate(reward*self._discountFactor)
+        self._tree.visits[node] = self._old_tree.visits[old_node]
+        self._tree.value[node] = self._old_tree.value[old_node]
+        if self._old_tree.num_children[old_node] > 0:
+            self._reuse[node] = old_node
     """
-    node that reach end state
+    backPropagation
     """
-    def endState(self):
-        return len(self._drafts) <= 0
+    def backPropagate(self, node, reward):
+        tree = self._tree
+        while node != -1:
+            tree.visits[node] += 1
+            tree.value[node] = tree.value[node] + ((reward - tree.value[node]) / tree.visits[node])
+            reward = reward*self._discountFactor
+            node = tree.parent[node]
     """
-    return child with largest q value
+    return child of the root with largest q value, None if the root was not expanded
     """
     def findBest_child(self):
-        bestChild = self._children[0]
-        for child in self._children:
-            if child.getValue() > bestChild.getValue():
+        tree = self._tree
+        if tree.num_children[ROOT] == 0:
+            return None
+        bestChild = tree.first_child[ROOT]
+        for child in tree.children(ROOT):
+            if tree.value[child] > tree.value[bestChild]:
                 bestChild = child
         return bestChild
-
-
-class MCTS(object):
-    def __init__(self, actions, game_state, player_color, discountFactor=0.9, maxDepth=6):
-        self._actions = actions
-        self._game_state = game_state
-        self._player_color = player_color
-        self._discountFactor = discountFactor
-        self._maxDepth = maxDepth
-
-    def mcts(self, timeout=0.9):
-        current_drafts = copy.deepcopy(self._game_state.board.draft)
-        current_chips_board = copy.deepcopy(self._game_state.board.chips)
-        current_actions = copy.deepcopy(self._actions)
-        current_player_color = copy.deepcopy(self._player_color)
-
-        # defind root_Node
-        root_Node = Node(current_chips_board, current_drafts, current_actions, current_player_color, last_action=None,
-                         parent=None)
-        # record the start time
-        start_time = int(time.time() * 1000)
-        current_time = int(time.time() * 1000)
-        while current_time < start_time + timeout * 1000 and len(root_Node._actions)>0 and len(root_Node._drafts)>0:
-            # select least visited sub node in root_Node's children, expand it if it is not expended
-            selected_Node = root_Node.select()
-            reward = 0
-            root_state = copy.deepcopy(current_chips_board)
-            selected_Node_last_action = copy.deepcopy(selected_Node._last_action)
-            reward = calReward(selected_Node_last_action, root_state, self._player_color)
-            if current_time > start_time + timeout * 1000:
-                break
-            # if selected_Node is not backPropagated, simulate it and do backPropagate
-            reward += self.simulate(selected_Node)
-            if current_time > start_time + timeout * 1000:
-                break
-            selected_Node.backPropagate(reward)
-            current_time = int(time.time() * 1000)
-
-        return root_Node
     """
-    simulation of selected node
+    simulation from the state of selected node
     """
-    def simulate(self, node):
-        node_copy = copy.deepcopy(node)
-        current_game_state = copy.deepcopy(node._game_state)
-        actions_copy = copy.deepcopy(node._actions)
-        drafts_copy = copy.deepcopy(node._drafts)
+    def simulate(self, state, time_manager=None):
+        current_game_state, actions_copy, drafts_copy = state
         cumulativeReward = 0.0
         depth = 1
         # do simulate while there are actions and drafts
         while (depth < self._maxDepth) and len(drafts_copy) > 0 and len(actions_copy) > 0:
+            # stop once time is up, mcts() then leaves this simulation out
+            if time_manager is not None and not time_manager.keepGoing():
+                break
             # randomly choose actions
             this_color = self._player_color
             this_seq_color = 'X'
@@ -185,6 +249,17 @@ class MCTS(object):
             depth += 1
         return cumulativeReward/depth
 
+"""
+search in a worker process of a root-parallel search, with its own random seed,
+return the statistics of the root and its children
+"""
+def searchRoot(root_state, color, deadline, seed):
+    random.seed(seed)
+    thisMcts = MCTS(root_state[1], None, color)
+    time_manager = TimeManager(deadline, margin=0.0)
+    tree = thisMcts.mcts(time_manager, root_state=root_state)
+    return tree.rootStats()
+
 """
 select the largest reward action
 """
@@ -293,6 +368,18 @@ def calReward(this_action, this_game_state, this_color):
         reward += 100
     return reward
 
+"""
+key of an action, to find the same action in last turn's tree
+"""
+def actionKey(action):
+    return action['type'], action['play_card'], action['draft_card'], action['coords']
+
+"""
+board chips with sequence chips turned back into their colour
+"""
+def teamChips(chips):
+    return [[RED if chip == RED_SEQ else BLU if chip == BLU_SEQ else chip for chip in row] for row in chips]
+
 """
 get the next board chips, next actions and drafts by action
 """
@@ -10,10 +10,25 @@ from template import Agent
 import heapq
 from Sequence.sequence_model import *
 import math
+import os
 
 EPSILON = 0.05
 GAMMA = 0.9
 ALPHA = 0.001
+WEIGHT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "QlearnWeight.txt")
+
+# parsed weights, shared by every agent in the process and only reparsed when the file changes
+weight_cache = {"mtime": None, "weights": None}
+
+
+def loadWeights():
+    mtime = os.path.getmtime(WEIGHT_FILE)
+    if weight_cache["mtime"] != mtime:
+        with open(WEIGHT_FILE, "r") as f:
+            weight_cache["weights"] = tuple(eval(line.strip()) for line in f if line.strip())
+        weight_cache["mtime"] = mtime
+    return weight_cache["weights"]
+
 
 class myAgent(Agent):
     def __init__(self, _id):
@@ -23,18 +38,15 @@ class myAgent(Agent):
         self.remove_weight = AdvancedDict()
         self.play_weight = AdvancedDict()
 
+    @staticmethod
+    def prepare():
+        # parse the weight file once, before the first game
+        loadWeights()
+
     def SelectAction(self, actions, game_state):
-        count = 1
-        for line in open("QlearnWeight.txt", "r"):
-            line = line.strip()
-            if count == 1:
-                self.draft_weight = eval(line)
-                count += 1
-            elif count == 2:
-                self.remove_weight = eval(line)
-                count += 1
-            else:
-                self.play_weight = eval(line)
+        # copies, as training updates the weights in place
+        draft, remove, play = loadWeights()
+        self.draft_weight, self.remove_weight, self.play_weight = dict(draft), dict(remove), dict(play)
         print(self.play_weight)
         whole_state = (game_state, actions)
         action = random.choice(actions)
@@ -193,7 +205,7 @@ class myAgent(Agent):
         print("draft weight:", self.draft_weight)
         print("remove weight:", self.remove_weight)
         print("play weight:", self.play_weight)
-        f = open("QlearnWeight.txt", 'w')
+        f = open(WEIGHT_FILE, 'w')
         f.write(str(self.draft_weight))
         f.write("\n")
         f.write(str(self.remove_weight))
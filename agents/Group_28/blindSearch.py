@@ -7,7 +7,7 @@
 #         one normal minimax(not working at all but can be report materials:))
 
 # IMPORTS ------------------------------------------------------------------------------------------------------------#
-from template import Agent
+from template import Agent, TimeManager
 import heapq, random
 import math
 from Sequence.sequence_model import *
@@ -17,6 +17,8 @@ class myAgent(Agent):
         super().__init__(_id)
 
     def SelectAction(self, actions, game_state):
+        # actions are scored until just before the deadline the game gave this move, and the best so far is returned
+        self.time_manager = TimeManager(self.deadline)
 
         # ucs Advanced
         action = self.uscSelectionA(actions, game_state)
@@ -34,6 +36,8 @@ class myAgent(Agent):
 
         minScore = math.inf
         for action in actions:
+            if not self.time_manager.keepGoing():
+                break
             score = self.uscActionsA(action, game_state)
             if minScore > score:
                 minScore = score
@@ -152,6 +156,8 @@ class myAgent(Agent):
 
         minScore = math.inf
         for action in actions:
+            if not self.time_manager.keepGoing():
+                break
             score = self.uscActions(action, game_state)
             if minScore > score:
                 minScore = score
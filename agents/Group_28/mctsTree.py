@@ -0,0 +1,175 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Array-backed search tree shared by the MCTS agents (Mcts, Mcts2, Mcts_UCB). A node is an index into
+#          parallel arrays of statistics and links, about 24 bytes in all, and only the root keeps a game state: the
+#          state of any other node is recomputed by replaying the actions on its path from the root. The states on the
+#          path last asked for are kept, so that nodes near each other are reached without replaying from the root.
+#          RootParallel runs extra searches of the same root in worker processes, and their statistics for the root's
+#          children are merged into the tree searched in the agent's own process.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import os
+import array
+import atexit
+import random
+import multiprocessing
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+ROOT = 0
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#Nodes are numbered in the order they are made, the root being 0. A node's children are all added at once, so they are
+#numbered consecutively from first_child[node]. The action of a node is the index of its action in the action list of
+#its parent's state, and `step(state, action)` returns the state that action leads to. What a state is, and how
+#statistics are updated, is left to the agent. States returned by state() are kept by the store, and must not be changed.
+class NodeStore:
+    def __init__(self, root_state, step):
+        self.root_state   = root_state
+        self.step         = step
+        self.parent       = array.array('i', [-1])
+        self.action       = array.array('h', [-1])
+        self.first_child  = array.array('i', [-1])
+        self.num_children = array.array('h', [0])
+        self.visits       = array.array('i', [1]) #Visits start at 1, which avoids dividing by zero.
+        self.value        = array.array('d', [0.0])
+        self._path        = []           #Path of the last node whose state was asked for,
+        self._path_states = [root_state] #and the states along it, starting with the root's.
+
+    def __len__(self):
+        return len(self.parent)
+
+    #Gives a leaf one child for each of the first `count` actions of its state, and returns the children as a range.
+    def expand(self, node, count):
+        first = len(self.parent)
+        self.first_child[node]  = first
+        self.num_children[node] = count
+        self.parent.extend([node]*count)
+        self.action.extend(range(count))
+        self.first_child.extend([-1]*count)
+        self.num_children.extend([0]*count)
+        self.visits.extend([1]*count)
+        self.value.extend([0.0]*count)
+        return range(first, first+count)
+
+    def children(self, node):
+        first = self.first_child[node]
+        return range(first, first+self.num_children[node])
+
+    #The first of the node's children with the fewest visits.
+    def leastVisited(self, node):
+        return min(self.children(node), key=self.visits.__getitem__)
+
+    #Action indices on the way from the root to node.
+    def path(self, node):
+        if node < 0:
+            raise ValueError("no such node: {}".format(node)) #-1 is the parent of the root, and first_child of a leaf.
+        actions = []
+        while node != ROOT:
+            actions.append(self.action[node])
+            node = self.parent[node]
+        actions.reverse()
+        return actions
+
+    #A node's path of action indices names it, so the states of the last path hold up to where the two paths part.
+    def state(self, node):
+        path   = self.path(node)
+        common = 0
+        while common < min(len(path), len(self._path)) and path[common] == self._path[common]:
+            common += 1
+        states = self._path_states[:common+1]
+        for action in path[common:]:
+            states.append(self.step(states[-1], action))
+        self._path, self._path_states = path, states
+        return states[-1]
+
+    #Visits and value of the root, and visits and values of its children, as sent back by a worker's search.
+    def rootStats(self):
+        children = self.children(ROOT)
+        return (self.visits[ROOT], self.value[ROOT],
+                self.visits[children.start:children.stop], self.value[children.start:children.stop])
+
+    #Adds the root statistics of another search of the same root, as if its iterations had been run in this tree.
+    #Visits start at 1 in both trees, so only the other's backpropagations are added. Values are running means over
+    #the visits if `average` is set (Mcts, Mcts2), and sums of rewards otherwise (Mcts_UCB).
+    def mergeRoot(self, stats, average=True):
+        visits, value, child_visits, child_values = stats
+        if len(child_visits) == 0:
+            return
+        if self.num_children[ROOT] == 0:
+            self.expand(ROOT, len(child_visits)) #Both searches expand the root the same way.
+        self._mergeNode(ROOT, visits, value, average)
+        for child,other_visits,other_value in zip(self.children(ROOT), child_visits, child_values):
+            self._mergeNode(child, other_visits, other_value, average)
+
+    def _mergeNode(self, node, visits, value, average):
+        total = self.visits[node] + visits - 1
+        if average:
+            self.value[node] = (self.value[node]*self.visits[node] + value*visits) / total
+        else:
+            self.value[node] += value
+        self.visits[node] = total
+
+
+#Root parallelism. Besides the search in the agent's process, workers-1 processes each search the same root with their
+#own random seed, and stop a little before it so that their statistics can be merged in time. The processes are
+#started on first use and shared by every agent of the process for later moves, growing when an agent asks for more.
+#close() stops them, and is also run at exit. A daemonic process, such as an agent run with --agentProcesses, cannot
+#start processes, so its searches run in its own process only.
+class RootParallel:
+    pool  = None #Shared by all instances, with its number of processes and the id of the process that started it.
+    size  = 0
+    owner = None
+
+    def __init__(self, margin=0.02):
+        self.margin = margin #Seconds before the agent's own search stops by which the workers stop.
+
+    #Starts the processes for searches with `workers` processes in all, unless enough are running already. Returns the
+    #pool, or None if the search is to run in this process only.
+    def startWorkers(self, workers):
+        if workers <= 1 or multiprocessing.current_process().daemon:
+            return None
+        cls = RootParallel
+        if cls.owner != os.getpid(): #A pool inherited through fork belongs to the parent, which stops it.
+            cls.pool, cls.size, cls.owner = None, 0, os.getpid()
+        if cls.size < workers-1:
+            cls.close()
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            cls.pool, cls.size, cls.owner = context.Pool(workers-1), workers-1, os.getpid()
+        return cls.pool
+
+    #Stops the shared processes of this process, if it started any.
+    @staticmethod
+    def close():
+        cls = RootParallel
+        if cls.pool is not None and cls.owner == os.getpid():
+            cls.pool.terminate()
+            cls.pool.join()
+        cls.pool, cls.size = None, 0
+
+    #Starts `search(*args, deadline, seed)` in workers-1 processes, returning the pending results for collect().
+    def start(self, search, args, time_manager, workers):
+        pool = self.startWorkers(workers)
+        if pool is None:
+            return []
+        deadline = time_manager.deadline - self.margin
+        return [pool.apply_async(search, args + (deadline, random.getrandbits(32))) for _ in range(workers-1)]
+
+    #The workers' results that arrive before the agent's deadline. Later ones are left out of this move.
+    def collect(self, pending, time_manager):
+        results = []
+        for result in pending:
+            try:
+                results.append(result.get(max(0.0, time_manager.timeLeft())))
+            except multiprocessing.TimeoutError:
+                pass
+        return results
+
+atexit.register(RootParallel.close)
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
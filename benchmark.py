@@ -0,0 +1,123 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Micro-benchmarks for the parts of the "Sequence" engine that bound how much search fits in an agent's turn.
+#
+#            clone     copy.deepcopy(state) against SequenceState.clone(), with and without trace history, on states
+#                      taken from random games at the start, middle and end of play
+#            parallel  root-parallel search of an MCTS agent (agents/Group_28) with 1 up to --workers processes: the
+#                      iterations each move gets for the same time budget, and the time the extra processes cost
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import copy
+import time
+import random
+import timeit
+import importlib
+from optparse import OptionParser
+from template import TimeManager
+from Sequence.sequence_model import SequenceGameRule
+from Sequence.sequence_bitboard import BitboardGameRule
+from agents.Group_28.mctsTree import RootParallel, ROOT
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Plays random games and returns the states seen after each fraction of the moves, as (label, agent to move, state).
+def sampleStates(game_rule, num_games, seed, fractions=(0.0, 0.5, 1.0)):
+    samples = []
+    for game_idx in range(num_games):
+        rule = game_rule(4, seed=seed+game_idx)
+        rng = random.Random(seed+game_idx)
+        states = [(rule.current_agent_index, copy.deepcopy(rule.current_game_state))]
+        while not rule.gameEnds():
+            rule.update(rng.choice(rule.getLegalActions(rule.current_game_state, rule.current_agent_index)))
+            states.append((rule.current_agent_index, copy.deepcopy(rule.current_game_state)))
+        for fraction in fractions:
+            idx = int(fraction*(len(states)-1))
+            samples.append(("move {:>3}".format(idx),) + states[idx])
+    return samples
+
+#Best of `repeat` runs, in microseconds per call.
+def timeCall(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+def benchClone(options):
+    game_rule = BitboardGameRule if options.bitboard else SequenceGameRule
+    print("{} engine, microseconds per copy (best of 5 x {})".format("bitboard" if options.bitboard else "list",
+                                                                       options.number))
+    print("{:<10} {:>10} {:>10} {:>14} {:>9}".format("state", "deepcopy", "clone", "clone+history", "speedup"))
+    totals = [0.0, 0.0, 0.0]
+    for label,_,state in sampleStates(game_rule, options.games, options.setRandomSeed):
+        times = [timeCall(lambda: copy.deepcopy(state), options.number),
+                 timeCall(lambda: state.clone(), options.number),
+                 timeCall(lambda: state.clone(include_history=True), options.number)]
+        totals = [total+t for total,t in zip(totals, times)]
+        print("{:<10} {:>10.1f} {:>10.1f} {:>14.1f} {:>8.1f}x".format(label, *times, times[0]/times[1]))
+    print("{:<10} {:>10.1f} {:>10.1f} {:>14.1f} {:>8.1f}x".format("total", *totals, totals[0]/totals[1]))
+
+#Each move is searched for the same time budget, so the gain from more processes shows as more iterations per move.
+#The overhead is how much longer a move takes than with one process, and startup the time to start the processes.
+def benchParallel(options):
+    module = importlib.import_module('agents.Group_28.'+options.agent)
+    game_rule = BitboardGameRule if options.bitboard else SequenceGameRule
+    rule = game_rule(4)
+    moves = []
+    for label,agent_id,state in sampleStates(game_rule, options.games, options.setRandomSeed, (0.0, 0.25, 0.5, 0.75)):
+        actions = rule.getLegalActions(state, agent_id)
+        if not any(action['type'] == 'trade' for action in actions): # the agents do not search these
+            moves.append((actions, state, state.agents[agent_id].colour))
+    print("{}, {} moves searched for {}s each".format(options.agent, len(moves), options.budget))
+    print("{:>7} {:>15} {:>12} {:>8} {:>12} {:>11}".format("workers", "iterations/move", "iterations/s", "speedup",
+                                                            "overhead ms", "startup ms"))
+    base_rate, base_time = None, None
+    for workers in range(1, options.workers+1):
+        parallel = RootParallel()
+        start = time.monotonic()
+        parallel.startWorkers(workers)
+        startup = time.monotonic()-start
+        iterations, elapsed = 0, 0.0
+        for actions,state,colour in moves:
+            search = module.MCTS(actions, state, colour)
+            time_manager = TimeManager(budget=options.budget)
+            tree = search.parallelMcts(time_manager, parallel, workers)
+            elapsed += time.monotonic()-time_manager.start
+            iterations += tree.visits[ROOT]-1
+        parallel.close()
+        rate, move_time = iterations/elapsed, elapsed/len(moves)
+        if base_rate is None:
+            base_rate, base_time = rate, move_time
+        print("{:>7} {:>15.1f} {:>12.1f} {:>7.2f}x {:>12.1f} {:>11.1f}".format(workers, iterations/len(moves), rate,
+              rate/base_rate, (move_time-base_time)*1000, startup*1000))
+
+BENCHMARKS = {'clone': benchClone, 'parallel': benchParallel}
+
+def loadParameter():
+    usageStr = """
+    USAGE:      python benchmark.py <options>
+    EXAMPLES:   python benchmark.py -b clone --bitboard
+                    - times deepcopy against SequenceState.clone on bitboard states
+                python benchmark.py -b parallel --agent Mcts2 -w 8
+                    - searches with Mcts2 on 1 to 8 processes
+    """
+    parser = OptionParser(usageStr)
+    parser.add_option('-b', '--bench', type='choice', choices=sorted(BENCHMARKS), help='Benchmark to run: '+', '.join(sorted(BENCHMARKS))+' (default: clone)', default='clone')
+    parser.add_option('-g', '--games', type='int', help='Number of random games to take states from (default: 2)', default=2)
+    parser.add_option('-n', '--number', type='int', help='Calls per timing run (default: 200)', default=200)
+    parser.add_option('--setRandomSeed', type='int', help='Seed of the first random game (default: 90054)', default=90054)
+    parser.add_option('--bitboard', action='store_true', help='Use the bitboard-backed game engine (default: False)', default=False)
+    parser.add_option('--agent', type='choice', choices=['Mcts', 'Mcts2', 'Mcts_UCB'], help='MCTS agent searched with by the parallel benchmark (default: Mcts)', default='Mcts')
+    parser.add_option('-w', '--workers', type='int', help='Largest number of processes tried by the parallel benchmark (default: 4)', default=4)
+    parser.add_option('--budget', type='float', help='Seconds each move is searched for by the parallel benchmark (default: 0.9)', default=0.9)
+    options, otherjunk = parser.parse_args()
+    assert len(otherjunk) == 0, "Unrecognized options: " + str(otherjunk)
+    return options
+
+# MAIN ---------------------------------------------------------------------------------------------------------------#
+
+if __name__ == '__main__':
+    options = loadParameter()
+    BENCHMARKS[options.bench](options)
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -5,16 +5,30 @@
 #- args warning_limit, timeout warnings 
 #- args displayer, TextDisplayer, GUIDisplayer or None
 #- args agents_namelist, name to display
+#- args compact_actions, pass agents the game rule's factorised action space instead of a copied list of actions
+#- args observation_views, pass agents a copy-on-write view of the game state instead of a deep copy
+#- args agent_processes, run each agent in its own long-lived worker process instead of a thread per move
+#- args agent_workers, AgentWorkers kept by the caller across games, one per agent (implies agent_processes)
+#- args replay_file, path of a binary replay to stream the game into as it is played, or None
+#- args state_rng, deal from an RNG kept in the game state instead of reseeding the random module before and after every move
+#  (off by default, so a seed plays the same game as in older versions)
 #- return replay, a dict
 
 import random
 import copy
 import sys
 from   template import GameState
+from   observation import ObservationView
 
 # from displayer import *
 from func_timeout import func_timeout, FunctionTimedOut
 import time
+
+# Seeds of the two RNGs a game in state_rng mode owns: the one its state deals from, and the one random actions are
+# picked from. Both are drawn from the game's seed, so the two never replay the same stream.
+def StateSeeds(seed):
+    seeds = random.Random(seed)
+    return seeds.getrandbits(64), seeds.getrandbits(64)
     
 class Game:
     def __init__(self, GameRule,
@@ -24,12 +38,28 @@ class Game:
                  time_limit=1, 
                  warning_limit=3, 
                  displayer = None, 
-                 agents_namelist = ["Alice","Bob"]):
+                 agents_namelist = ["Alice","Bob"],
+                 compact_actions = False,
+                 observation_views = False,
+                 agent_processes = False,
+                 agent_workers = None,
+                 replay_file = None,
+                 state_rng = False):
         
         self.seed = seed
         random.seed(self.seed)
-        self.seed_list = [random.randint(0,1e10) for _ in range(1000)]
-        self.seed_idx = 0
+        # With state_rng, the game state deals from its own RNG, seeded once, so agents using the random module cannot
+        # change the game, and random actions picked in place of an agent's come from a separate RNG of the game's own.
+        # Otherwise (the legacy mode, which older replays need), the random module is reseeded around every move.
+        self.state_rng = state_rng
+        if self.state_rng:
+            deal_seed,choice_seed = StateSeeds(self.seed)
+            self.rng = random.Random(choice_seed)
+        else:
+            deal_seed = None
+            self.rng = random
+            self.seed_list = [random.randint(0,1e10) for _ in range(1000)]
+            self.seed_idx = 0
 
         # Make sure we are forming a valid game, and that agent
         # id's range from 0 to N-1, where N is the number of agents.
@@ -41,7 +71,7 @@ class Game:
             assert(plyr.id == i)    
             i += 1
 
-        self.game_rule = GameRule(num_of_agent)
+        self.game_rule = GameRule(num_of_agent, seed=deal_seed)
         self.agents = agent_list
         self.agents_namelist = agents_namelist
 
@@ -50,6 +80,13 @@ class Game:
         self.warnings = [0]*len(agent_list)
         self.warning_positions = []
 
+        self.compact_actions = compact_actions
+        self.observation_views = observation_views
+        self.agent_processes = agent_processes
+        self.agent_workers = agent_workers
+        self.workers = None
+        self.replay_file = replay_file
+        self.recorder = None
         self.displayer = displayer
         
         if self.displayer is not None:
@@ -57,6 +94,7 @@ class Game:
 
     def _EndGame(self,num_of_agent,history, isTimeOut = True, id = None):
         history.update({"seed":self.seed,
+                        "rng":self._RngMode(),
                         "num_of_agent":num_of_agent,
                         "agents_namelist":self.agents_namelist,
                         "warning_positions":self.warning_positions,
@@ -68,38 +106,111 @@ class Game:
             for i in range(num_of_agent):
                 history["scores"].update({i:self.game_rule.calScore(self.game_rule.current_game_state,i)})
 
+        if self.recorder is not None:
+            self.recorder.close(history["scores"])
+            self.recorder = None
         if self.displayer is not None:
             self.displayer.EndGame(self.game_rule.current_game_state,history["scores"])
         return history
 
+    # Recorded in replays, so they are replayed in the same mode. Replays without it are from the legacy mode.
+    def _RngMode(self):
+        return "state" if self.state_rng else "global"
+
+    # The attributes an agent may not observe, in the nested form taken by ObservationView.
+    def _HiddenAttributes(self, game_state, agent_index):
+        if not self.game_rule.private_information:
+            return {}
+        private = {attr:True for attr in self.game_rule.private_information}
+        return {"deck":{"cards":True, "rng":True},
+                "agents":{i:private for i in range(len(game_state.agents)) if game_state.agents[i].id != agent_index}}
+
+    # Calls the agent's SelectAction, either on a thread under func_timeout or in the agent's worker process.
+    # Workers pickle the master state themselves, leaving out whatever the agent may not observe. An agent that
+    # expects a list of actions is sent the factorised action space, and the worker expands it.
+    # Either way, the agent is first told its deadline and how many warnings it has left (see template.Agent).
+    def _SelectAction(self, agent_index, actions, game_state, action_counter):
+        warnings_left = self.warning_limit - self.warnings[agent_index]
+        if self.workers is not None:
+            return self.workers[agent_index].SelectAction(actions, game_state, self.time_limit, action_counter,
+                                                          self._HiddenAttributes(game_state, agent_index),
+                                                          as_list=not self.compact_actions,
+                                                          warnings_left=warnings_left)
+        agent = self.agents[agent_index]
+        agent.deadline = None if self.time_limit is None else time.monotonic() + self.time_limit
+        agent.warnings_left = warnings_left
+        return func_timeout(self.time_limit,agent.SelectAction,args=(actions, game_state))
+
     def Run(self):
+        if self.replay_file is not None:
+            from Sequence.sequence_replay import ReplayWriter # imported only when a binary replay is written
+            self.recorder = ReplayWriter(self.replay_file, {"seed":self.seed,
+                                                            "rng":self._RngMode(),
+                                                            "num_of_agent":self.game_rule.num_of_agent,
+                                                            "agents_namelist":self.agents_namelist,
+                                                            "warning_limit":self.warning_limit})
+        if self.agent_workers is not None:
+            self.workers = self.agent_workers
+            for worker,agent in zip(self.workers, self.agents):
+                worker.NewGame(agent)
+        elif self.agent_processes:
+            from agent_worker import AgentWorker # imported only when agents run in worker processes
+            self.workers = [AgentWorker(agent) for agent in self.agents]
+        try:
+            return self._Run()
+        finally:
+            if self.workers is not None:
+                if self.workers is not self.agent_workers: # Workers kept by the caller stay up for its next game.
+                    for worker in self.workers:
+                        worker.Close()
+                self.workers = None
+            if self.recorder is not None: # The game did not finish, but the replay still holds every move played.
+                self.recorder.close()
+                self.recorder = None
+
+    def _Run(self):
         history = {"actions":[]}
         action_counter = 0
+        warnings_recorded = 0
         while not self.game_rule.gameEnds():
             agent_index = self.game_rule.getCurrentAgentIndex()
             agent = self.agents[agent_index]
             game_state = self.game_rule.current_game_state
-            actions = self.game_rule.getLegalActions(game_state, agent_index)
-            actions_copy = copy.deepcopy(actions)
-            gs_copy = copy.deepcopy(game_state)
+            # The factorised action space is never modified, so agents can share it without a copy.
+            # Worker processes get their copies by unpickling. The space holds the same actions, in the same order,
+            # as the list, so a random fallback below picks the same action from either.
+            if self.compact_actions or (self.workers is not None and hasattr(self.game_rule, "getActionSpace")):
+                actions = self.game_rule.getActionSpace(game_state, agent_index)
+                actions_copy = actions
+            else:
+                actions = self.game_rule.getLegalActions(game_state, agent_index)
+                actions_copy = actions if self.workers is not None else copy.deepcopy(actions)
+            # A view shares the master state and hides the same attributes the deep copy would have deleted.
+            if self.workers is not None:
+                gs_copy = game_state
+            elif self.observation_views:
+                gs_copy = ObservationView(game_state, self._HiddenAttributes(game_state, agent_index))
+            else:
+                gs_copy = copy.deepcopy(game_state)
             
-            # Delete all specified attributes in the agent state copies, if this isn't a perfect information game.
-            if self.game_rule.private_information:
-                delattr(gs_copy.deck, 'cards') # Upcoming cards cannot be observed.
-                for i in range(len(gs_copy.agents)):
-                    if gs_copy.agents[i].id != agent_index:
-                        for attr in self.game_rule.private_information:
-                            delattr(gs_copy.agents[i], attr)
+                # Delete all specified attributes in the agent state copies, if this isn't a perfect information game.
+                if self.game_rule.private_information:
+                    delattr(gs_copy.deck, 'cards') # Upcoming cards cannot be observed.
+                    delattr(gs_copy.deck, 'rng')   # Nor can the RNG that deals them.
+                    for i in range(len(gs_copy.agents)):
+                        if gs_copy.agents[i].id != agent_index:
+                            for attr in self.game_rule.private_information:
+                                delattr(gs_copy.agents[i], attr)
             
             # Allow agent to select action within time limit. Any error will result in one warning.
             try:
-                selected = func_timeout(self.time_limit,agent.SelectAction,args=(actions_copy, gs_copy))
+                selected = self._SelectAction(agent_index, actions_copy, gs_copy, action_counter)
 
             except AttributeError:
                 print("[AttributeError]: SelectAction() is not defined!")
                 print("Selecting random action instead!")
                 self.warnings[agent_index] += 1
-                selected = random.choice(actions_copy)
+                selected = self.rng.choice(actions_copy)
                 if self.displayer is not None:
                     self.displayer.TimeOutWarning(self,agent_index)
                 self.warning_positions.append((agent_index,action_counter))
@@ -108,7 +219,7 @@ class Game:
                 print("[TimeoutError] timeout when calling SelectAction()!")
                 print("Selecting random action instead!")
                 self.warnings[agent_index] += 1
-                selected = random.choice(actions_copy)
+                selected = self.rng.choice(actions_copy)
                 if self.displayer is not None:
                     self.displayer.TimeOutWarning(self,agent_index)
                 self.warning_positions.append((agent_index,action_counter))
@@ -117,7 +228,7 @@ class Game:
                 print("[OtherError] error occured when calling SelectAction()!")
                 print("Selecting random action instead!")
                 self.warnings[agent_index] += 1
-                selected = random.choice(actions_copy)
+                selected = self.rng.choice(actions_copy)
                 if self.displayer is not None:
                     self.displayer.TimeOutWarning(self,agent_index)
                 self.warning_positions.append((agent_index,action_counter))
@@ -126,7 +237,7 @@ class Game:
             if selected is None:
                 print("[Warning] action \"None\" is returned by SelectAction()!")
                 print("Selecting random action instead!")
-                selected = random.choice(actions_copy)
+                selected = self.rng.choice(actions_copy)
                 if self.displayer is not None:
                     self.displayer.TimeOutWarning(self,agent_index)
                 self.warnings[agent_index] += 1
@@ -138,19 +249,26 @@ class Game:
             if not selected in actions_copy:
                 print(f"[Warning] invalid action {selected} is returned by SelectAction()!")
                 print("Selecting random action instead!")
-                selected = random.choice(actions_copy)
+                selected = self.rng.choice(actions_copy)
                 if self.displayer is not None:
                     self.displayer.TimeOutWarning(self,agent_index)
                 self.warnings[agent_index] += 1
                 self.warning_positions.append((agent_index,action_counter))
 
-            random.seed(self.seed_list[self.seed_idx])
-            self.seed_idx += 1
+            if not self.state_rng:
+                random.seed(self.seed_list[self.seed_idx])
+                self.seed_idx += 1
             history["actions"].append({action_counter:{"agent_id":self.game_rule.current_agent_index,"action":selected}})
+            if self.recorder is not None:
+                for warning in self.warning_positions[warnings_recorded:]:
+                    self.recorder.writeWarning(*warning)
+                warnings_recorded = len(self.warning_positions)
+                self.recorder.writeAction(self.game_rule.current_agent_index, selected)
             action_counter += 1
             self.game_rule.update(selected)
-            random.seed(self.seed_list[self.seed_idx])
-            self.seed_idx += 1
+            if not self.state_rng:
+                random.seed(self.seed_list[self.seed_idx])
+                self.seed_idx += 1
 
             if self.displayer is not None:
                 self.displayer.ExcuteAction(agent_index,selected, self.game_rule.current_game_state)
@@ -164,38 +282,93 @@ class Game:
             
 
 class GameReplayer:
-    def __init__(self,GameRule,replay, displayer = None):
+    def __init__(self,GameRule,replay, displayer = None, snapshot_interval = 20):
         self.replay = replay
                     
         self.seed = self.replay["seed"]
-        random.seed(self.seed)
-        self.seed_list = [random.randint(0,1e10) for _ in range(1000)]
-        self.seed_idx = 0
+        self.state_rng = self.replay.get("rng", "global") == "state"
+        if not self.state_rng:
+            random.seed(self.seed)
+            self.seed_list = [random.randint(0,1e10) for _ in range(1000)]
+            self.seed_idx = 0
 
         self.num_of_agent = self.replay["num_of_agent"]
         self.agents_namelist = replay["agents_namelist"]
         self.warning_limit = replay["warning_limit"]
         self.warnings = [0]*self.num_of_agent
         self.warning_positions = replay["warning_positions"]
-        self.game_rule = GameRule(self.num_of_agent)
+        self.game_rule = GameRule(self.num_of_agent, seed=StateSeeds(self.seed)[0] if self.state_rng else None)
         self.scores=replay["scores"]
 
+        # Snapshots of the game every snapshot_interval moves, keyed by the number of moves played. They are taken
+        # while replaying, so seek() only ever re-applies the moves since the nearest snapshot at or before its target.
+        # With snapshot_interval None, none are taken, and the replay can only be played forward.
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {}
+        self.move_index = 0
+        if self.snapshot_interval is not None:
+            self._Snapshot()
+
         self.displayer = displayer
         if self.displayer is not None:
             self.displayer.InitDisplayer(self)           
-  
-    def Run(self):
-        for item in self.replay["actions"]:
-            (index, info), = item.items()
-            selected = info["action"]
-            agent_index = info["agent_id"]
-            self.game_rule.current_agent_index = agent_index          
 
+    def _Snapshot(self):
+        self.snapshots[self.move_index] = (copy.deepcopy(self.game_rule.current_game_state),
+                                           self.game_rule.current_agent_index,
+                                           self.game_rule.action_counter)
+
+    # Plays the next recorded move and returns (move index, {"agent_id", "action"}) from the replay. Nothing is
+    # displayed. Legacy replays seed the random module exactly as Game.Run did when the move was played; otherwise the
+    # state's own RNG, restored along with snapshots, deals the same cards again.
+    def step(self):
+        (index, info), = self.replay["actions"][self.move_index].items()
+        self.game_rule.current_agent_index = info["agent_id"]
+        if self.state_rng:
+            self.game_rule.update(info["action"])
+        else:
+            self.seed_idx = 2*self.move_index
             random.seed(self.seed_list[self.seed_idx])
             self.seed_idx += 1
-            self.game_rule.update(selected)
+            self.game_rule.update(info["action"])
             random.seed(self.seed_list[self.seed_idx])
             self.seed_idx += 1
+        self.move_index += 1
+        if self.snapshot_interval is not None and self.move_index % self.snapshot_interval == 0 \
+                and self.move_index not in self.snapshots:
+            self._Snapshot()
+        return index, info
+
+    # Iterating over a replayer steps through the rest of the replay, yielding what step() returns for each move.
+    def __iter__(self):
+        while self.move_index < len(self.replay["actions"]):
+            yield self.step()
+
+    # Moves the replay to the state after move_index moves (clamped to the game's length) and returns that state.
+    # Nothing is displayed; Run() afterwards carries on from this point.
+    def seek(self, move_index):
+        move_index = max(0, min(move_index, len(self.replay["actions"])))
+        start = max((m for m in self.snapshots if m <= move_index), default=self.move_index)
+        if not start <= self.move_index <= move_index: # Otherwise, just keep playing forward from the current move.
+            if start not in self.snapshots:
+                raise ValueError("seek() cannot go back to move {} without snapshots".format(move_index))
+            state, agent_index, action_counter = self.snapshots[start]
+            self.game_rule.current_game_state = copy.deepcopy(state)
+            self.game_rule.current_agent_index = agent_index
+            self.game_rule.action_counter = action_counter
+            self.move_index = start
+        while self.move_index < move_index:
+            self.step()
+        self.warnings = [0]*self.num_of_agent
+        for agent_index,index in self.warning_positions:
+            if index < move_index:
+                self.warnings[agent_index] += 1
+        return self.game_rule.current_game_state
+  
+    def Run(self):
+        for index, info in self:
+            selected = info["action"]
+            agent_index = info["agent_id"]
             if self.displayer is not None:
                 if (agent_index,index) in self.warning_positions:
                     self.warnings[agent_index] += 1
@@ -204,4 +377,3 @@ class GameReplayer:
             
         if self.displayer is not None:
             self.displayer.EndGame(self.game_rule.current_game_state,self.scores)
-   
\ No newline at end of file
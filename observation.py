@@ -0,0 +1,372 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Copy-on-write observation views, handed to agents in place of a deep copy of the game state. A view reads
+#          straight through to the master state, hides private attributes, and only copies the parts an agent writes to.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import copy
+import types
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+_PLAIN_TYPES = {str, int, float, bool, bytes, type(None)}
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Builds the observation of `target` seen by an agent. `hidden` is a nested dict mirroring the state: a value of True
+#hides that attribute, a dict is applied to the attribute's own contents (list indices for lists, keys for dicts).
+#The view is only valid while the master state is unchanged, i.e. for the duration of one SelectAction call. Agents
+#that keep an observation around should deepcopy it, which returns a plain, independent copy.
+def ObservationView(target, hidden=None):
+    return _Wrap(target, hidden)
+
+#Plain values are shared as they are, containers and plain objects get a view, anything else is copied up front,
+#through its own clone() where it has one.
+#Lists of plain values (hands, drafts, and the board's rows of chips) are copied straight away: a shallow copy is
+#cheaper than the per-item lookups of a view, and agents index them in their innermost loops.
+def _Wrap(value, spec=None):
+    if isinstance(value, list):
+        if not spec:
+            if all(_IsPlain(item) for item in value):
+                return list(value)
+            if all(type(item) is list and all(_IsPlain(x) for x in item) for item in value):
+                return [list(item) for item in value]
+        return ListView(value, spec)
+    if isinstance(value, dict):
+        return DictView(value, spec)
+    if _IsImmutable(value) or isinstance(value, (type, types.FunctionType, types.ModuleType, types.MethodType)):
+        return value
+    if hasattr(value, '__dict__') and getattr(type(value), '__getstate__', None) is getattr(object, '__getstate__', None):
+        return ObjectView(value, spec)
+    if callable(getattr(value, 'clone', None)): #e.g. bitboards, which copy themselves far more cheaply than deepcopy.
+        return value.clone()
+    return copy.deepcopy(value) #e.g. RNGs, whose state does not live in a plain __dict__.
+
+def _IsPlain(value):
+    if type(value) is tuple: #e.g. board coordinates.
+        return all(type(item) in _PLAIN_TYPES for item in value)
+    return type(value) in _PLAIN_TYPES
+
+def _IsImmutable(value):
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return True
+    if hasattr(value, '__dict__'):
+        return False
+    try: #Hashable values without a __dict__ (tuples of plain values, frozen actions) cannot be changed in place.
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+#Turns a view (or anything holding views) into a plain, independent copy.
+def _Materialize(value, memo):
+    if isinstance(value, (ObjectView, ListView, DictView)):
+        return value._materialize(memo)
+    return copy.deepcopy(value, memo)
+
+#Unpickling a view just hands back the plain copy that was pickled in its place.
+def _Identity(value):
+    return value
+
+#Records the copy of a view in the deepcopy memo. Views made on the fly while materializing are kept alive alongside
+#it, as copy.deepcopy does for its originals, so that their ids cannot be reused by later views within the same copy.
+def _Remember(view, new, memo):
+    memo[id(view)] = new
+    memo.setdefault(id(memo), []).append(view)
+
+def _Plain(value):
+    return _Materialize(value, {}) if isinstance(value, (ObjectView, ListView, DictView)) else value
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#Shared plumbing: copying or pickling a view always produces a plain copy, never another view.
+class _View:
+    __slots__ = ()
+
+    def __copy__(self):
+        return self._materialize({})
+
+    def __deepcopy__(self, memo):
+        return self._materialize(memo)
+
+    def __reduce_ex__(self, protocol):
+        return (_Identity, (self._materialize({}),))
+
+    def __eq__(self, other):
+        return other is self or _Plain(self) == _Plain(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._materialize({}))
+
+
+#View of a plain object. Attributes are looked up on the target once and then kept in the view's own __dict__, so
+#repeated reads are ordinary attribute lookups. Written attributes only ever land in the view, deleted ones are masked.
+class ObjectView(_View):
+    __slots__ = ('__dict__', '_target', '_spec', '_deleted', '_own')
+
+    def __init__(self, target, spec=None):
+        object.__setattr__(self, '_target',  target)
+        object.__setattr__(self, '_spec',    spec or {})
+        object.__setattr__(self, '_deleted', set())
+        object.__setattr__(self, '_own',     None)
+
+    #Only reached for attributes the view has not looked up yet.
+    def __getattr__(self, name):
+        if self._own is not None:
+            return getattr(self._own, name)
+        if name in self._deleted or self._spec.get(name) is True:
+            raise AttributeError(f"'{type(self._target).__name__}' object has no attribute '{name}'")
+
+        attrs = self._target.__dict__
+        if name in attrs:
+            value = _Wrap(attrs[name], self._spec.get(name))
+            self.__dict__[name] = value
+            return value
+
+        value = getattr(self._target, name)
+        #A bound method could change the object behind the view's back, so the agent gets its own copy from here on.
+        if getattr(value, '__self__', None) is self._target:
+            object.__setattr__(self, '_own', self._materialize({}))
+            self.__dict__.clear()
+            return getattr(self._own, name)
+        return _Wrap(value)
+
+    #Printing an observation should not copy it. This mirrors the default object repr.
+    def __repr__(self):
+        if self._own is not None:
+            return repr(self._own)
+        cls = type(self._target)
+        return f"<{cls.__module__}.{cls.__qualname__} object at {hex(id(self))}>"
+
+    def __setattr__(self, name, value):
+        if self._own is not None:
+            return setattr(self._own, name, value)
+        self.__dict__[name] = value
+        self._deleted.discard(name)
+
+    def __delattr__(self, name):
+        if self._own is not None:
+            return delattr(self._own, name)
+        in_target = name in self._target.__dict__ and name not in self._deleted
+        if name not in self.__dict__ and (not in_target or self._spec.get(name) is True):
+            raise AttributeError(name)
+        self.__dict__.pop(name, None)
+        if in_target:
+            self._deleted.add(name)
+
+    def _materialize(self, memo):
+        if self._own is not None:
+            return copy.deepcopy(self._own, memo)
+        if id(self) in memo:
+            return memo[id(self)]
+        cls = type(self._target)
+        new = cls.__new__(cls)
+        _Remember(self, new, memo)
+        seen = self.__dict__
+        for name,value in self._target.__dict__.items():
+            if name in seen or name in self._deleted or self._spec.get(name) is True:
+                continue
+            new.__dict__[name] = _Materialize(_Wrap(value, self._spec.get(name)), memo)
+        for name,value in seen.items():
+            new.__dict__[name] = _Materialize(value, memo)
+        return new
+
+
+#View of a list. The first write swaps in a local list holding the (still lazy) views of the items.
+class ListView(_View):
+    __slots__ = ('_target', '_spec', '_children', '_own')
+
+    def __init__(self, target, spec=None):
+        self._target   = target
+        self._spec     = spec or {}
+        self._children = {}
+        self._own      = None
+
+    def _item(self, i):
+        if self._own is not None:
+            return self._own[i]
+        child = self._children.get(i)
+        if child is None:
+            value = self._target[i]
+            child = _Wrap(value, self._spec.get(i))
+            if child is value:
+                return value
+            self._children[i] = child
+        return child
+
+    def _write(self):
+        if self._own is None:
+            self._own = [self._item(i) for i in range(len(self._target))]
+        return self._own
+
+    def __len__(self):
+        return len(self._target) if self._own is None else len(self._own)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice): #Slicing a list makes a new list, so the agent gets a plain copy.
+            return [_Plain(self._item(i)) for i in range(len(self))[index]]
+        return self._item(range(len(self))[index])
+
+    def __iter__(self):
+        return (self._item(i) for i in range(len(self)))
+
+    def __reversed__(self):
+        return (self._item(i) for i in reversed(range(len(self))))
+
+    def __contains__(self, value):
+        return value in self._target if self._own is None else value in self._own
+
+    def __add__(self, other):
+        return _Plain(self) + list(other)
+
+    def index(self, value, *args):
+        return (self._target if self._own is None else self._own).index(value, *args)
+
+    def count(self, value):
+        return (self._target if self._own is None else self._own).count(value)
+
+    def copy(self):
+        return _Plain(self)
+
+    def __setitem__(self, index, value):
+        self._write()[index] = value
+
+    def __delitem__(self, index):
+        del self._write()[index]
+
+    def __iadd__(self, other):
+        self._write().extend(other)
+        return self
+
+    def append(self, value):
+        self._write().append(value)
+
+    def extend(self, values):
+        self._write().extend(values)
+
+    def insert(self, index, value):
+        self._write().insert(index, value)
+
+    def remove(self, value):
+        self._write().remove(value)
+
+    def pop(self, index=-1):
+        return self._write().pop(index)
+
+    def clear(self):
+        self._write().clear()
+
+    def sort(self, *args, **kwargs):
+        self._write().sort(*args, **kwargs)
+
+    def reverse(self):
+        self._write().reverse()
+
+    def _materialize(self, memo):
+        if id(self) in memo:
+            return memo[id(self)]
+        new = []
+        _Remember(self, new, memo)
+        new.extend(_Materialize(self._item(i), memo) for i in range(len(self)))
+        return new
+
+
+#View of a dict, following the same scheme as ListView.
+class DictView(_View):
+    __slots__ = ('_target', '_spec', '_children', '_own')
+
+    def __init__(self, target, spec=None):
+        self._target   = target
+        self._spec     = spec or {}
+        self._children = {}
+        self._own      = None
+
+    def _item(self, key):
+        if self._own is not None:
+            return self._own[key]
+        child = self._children.get(key)
+        if child is None:
+            value = self._target[key]
+            child = _Wrap(value, self._spec.get(key))
+            if child is value:
+                return value
+            self._children[key] = child
+        return child
+
+    def _write(self):
+        if self._own is None:
+            self._own = {key:self._item(key) for key in self._target}
+        return self._own
+
+    def _current(self):
+        return self._target if self._own is None else self._own
+
+    def __len__(self):
+        return len(self._current())
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, key):
+        return self._item(key)
+
+    def get(self, key, default=None):
+        return self._item(key) if key in self._current() else default
+
+    def __iter__(self):
+        return iter(list(self._current()))
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def keys(self):
+        return self._current().keys()
+
+    def values(self):
+        return [self._item(key) for key in list(self._current())]
+
+    def items(self):
+        return [(key, self._item(key)) for key in list(self._current())]
+
+    def copy(self):
+        return _Plain(self)
+
+    def __setitem__(self, key, value):
+        self._write()[key] = value
+
+    def __delitem__(self, key):
+        del self._write()[key]
+
+    def pop(self, key, *default):
+        return self._write().pop(key, *default)
+
+    def popitem(self):
+        return self._write().popitem()
+
+    def setdefault(self, key, default=None):
+        return self._write().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self._write().update(*args, **kwargs)
+
+    def clear(self):
+        self._write().clear()
+
+    def _materialize(self, memo):
+        if id(self) in memo:
+            return memo[id(self)]
+        new = {}
+        _Remember(self, new, memo)
+        for key in list(self._current()):
+            new[key] = _Materialize(self._item(key), memo)
+        return new
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,158 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Exports recorded "Sequence" games (.replay files, pickled or binary) as NumPy training data. Games are
+#          replayed headlessly in worker processes, and one row is written per move, seen from the agent to move:
+#
+#            boards    (N,6,10,10) uint8  one plane per chip type, in the order of CHIP_PLANES
+#            hands     (N,52)      uint8  copies of each card (indexed as CARDS) in the agent's hand
+#            drafts    (N,52)      uint8  copies of each card in the draft
+#            actions   (N,4)       int8   type, play card, draft card, r*10+c, -1 for None (see sequence_replay)
+#            agents    (N,)        uint8  id of the agent to move (even ids play red, odd ids blue)
+#            outcomes  (N,)        int8   final result for that agent's team: 1 win, 0 tie, -1 loss
+#            games     (N,)        int32  index of the game in the export's file list (see files.txt)
+#
+#          Rows are split into chunk-XXXXX directories holding one .npy file per array, which can be opened with
+#          numpy.load(path, mmap_mode='r') and streamed without re-simulating any games.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import os
+import glob
+import multiprocessing
+import numpy as np
+from optparse import OptionParser
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceGameRule as GameRule, CARDS
+from Sequence.sequence_replay import LoadReplay, TYPE_INDEX, CARD_INDEX
+from game import GameReplayer
+
+# CONSTANTS ----------------------------------------------------------------------------------------------------------#
+
+CHIP_PLANES = [RED, BLU, RED_SEQ, BLU_SEQ, JOKER, EMPTY]
+PLANE_INDEX = {chip:i for i,chip in enumerate(CHIP_PLANES)}
+ARRAYS      = ['boards', 'hands', 'drafts', 'actions', 'agents', 'outcomes', 'games']
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+def cardCounts(cards):
+    counts = np.zeros(len(CARDS), dtype=np.uint8)
+    for card in cards:
+        counts[CARD_INDEX[card]] += 1
+    return counts
+
+def encodeAction(action):
+    coords = action['coords']
+    return [TYPE_INDEX[action['type']],
+            -1 if action['play_card']  is None else CARD_INDEX[action['play_card']],
+            -1 if action['draft_card'] is None else CARD_INDEX[action['draft_card']],
+            -1 if coords is None else coords[0]*10+coords[1]]
+
+# Replays one game and returns its rows as a dict of arrays, or None if the file cannot be read.
+def exportReplay(args):
+    game_idx, path = args
+    try:
+        replay = LoadReplay(path)
+    except Exception:
+        return None
+    scores = replay["scores"]
+    team_score = [sum(score for i,score in scores.items() if int(i)%2==team) for team in range(2)]
+
+    rows = {name:[] for name in ARRAYS}
+    # the game is only played forward, so the replayer takes no snapshots for seeking
+    replayer = GameReplayer(GameRule, replay, snapshot_interval=None)
+    for item in replay["actions"]:
+        (_, info), = item.items()
+        agent_id = info["agent_id"]
+        state = replayer.game_rule.current_game_state
+
+        board = np.zeros((len(CHIP_PLANES),10,10), dtype=np.uint8)
+        for r in range(10):
+            for c in range(10):
+                board[PLANE_INDEX[state.board.chips[r][c]],r,c] = 1
+        team, opp = agent_id%2, 1-agent_id%2
+
+        rows['boards'].append(board)
+        rows['hands'].append(cardCounts(state.agents[agent_id].hand))
+        rows['drafts'].append(cardCounts(state.board.draft))
+        rows['actions'].append(encodeAction(info["action"]))
+        rows['agents'].append(agent_id)
+        rows['outcomes'].append(int(np.sign(team_score[team]-team_score[opp])))
+        rows['games'].append(game_idx)
+        replayer.step()
+
+    if not rows['games']:
+        return None
+    return {'boards':   np.stack(rows['boards']),
+            'hands':    np.stack(rows['hands']),
+            'drafts':   np.stack(rows['drafts']),
+            'actions':  np.array(rows['actions'],  dtype=np.int8),
+            'agents':   np.array(rows['agents'],   dtype=np.uint8),
+            'outcomes': np.array(rows['outcomes'], dtype=np.int8),
+            'games':    np.array(rows['games'],    dtype=np.int32)}
+
+def writeChunk(output, chunk_idx, arrays):
+    chunk_dir = os.path.join(output, "chunk-{:05d}".format(chunk_idx))
+    os.makedirs(chunk_dir, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(chunk_dir, name+".npy"), arrays[name])
+
+def run(options):
+    files = sorted(f for pattern in options.input.split(',') for f in glob.glob(pattern))
+    os.makedirs(options.output, exist_ok=True)
+    with open(os.path.join(options.output, "files.txt"), 'w') as f:
+        f.write("\n".join(files)+"\n")
+
+    pending, num_rows, chunk_idx, skipped = [], 0, 0, 0
+    pool = multiprocessing.Pool(options.jobs) if options.jobs > 1 else None
+    # the pool is stopped even if writing a chunk fails, so no worker outlives the export
+    try:
+        games = pool.imap(exportReplay, enumerate(files), chunksize=4) if pool else map(exportReplay, enumerate(files))
+        # games arrive in file order, and each full chunk is written out as soon as it is complete
+        for arrays in games:
+            if arrays is None:
+                skipped += 1
+                continue
+            pending.append(arrays)
+            num_rows += len(arrays['games'])
+            while num_rows >= options.chunkSize:
+                merged = {name:np.concatenate([a[name] for a in pending]) for name in ARRAYS}
+                writeChunk(options.output, chunk_idx, {name:merged[name][:options.chunkSize] for name in ARRAYS})
+                chunk_idx += 1
+                pending = [{name:merged[name][options.chunkSize:] for name in ARRAYS}]
+                num_rows -= options.chunkSize
+        if num_rows:
+            writeChunk(options.output, chunk_idx, {name:np.concatenate([a[name] for a in pending]) for name in ARRAYS})
+            chunk_idx += 1
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    if not options.quiet:
+        print("Exported {} games ({} skipped) into {} chunks in {}".format(len(files)-skipped, skipped, chunk_idx, options.output))
+    return chunk_idx
+
+def loadParameter():
+    usageStr = """
+    USAGE:      python replay_export.py -i <replay files> -o <output directory> <options>
+    EXAMPLES:   python replay_export.py -i "output/*.replay" -o dataset -j 8
+                    - exports every replay in output/ into dataset/chunk-XXXXX/*.npy, using 8 processes
+    """
+    parser = OptionParser(usageStr)
+    parser.add_option('-i', '--input', help='Glob pattern(s) of replay files, comma separated (default: output/*.replay)', default='output/*.replay')
+    parser.add_option('-o', '--output', help='Output directory for the .npy chunks (default: dataset)', default='dataset')
+    parser.add_option('-c', '--chunkSize', type='int', help='Number of moves per chunk (default: 100000)', default=100000)
+    parser.add_option('-j', '--jobs', type='int', help='Number of processes replaying games (default: 1)', default=1)
+    parser.add_option('-q', '--quiet', action='store_true', help='No summary output (default: False)', default=False)
+    options, otherjunk = parser.parse_args()
+    assert len(otherjunk) == 0, "Unrecognized options: " + str(otherjunk)
+    return options
+
+# MAIN ---------------------------------------------------------------------------------------------------------------#
+
+if __name__ == '__main__':
+    run(loadParameter())
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -12,10 +12,10 @@ import importlib
 import traceback
 import datetime
 import time
+START_TIME = time.perf_counter() # for measuring how long the runner takes to start up
 import pickle
 import random
 from Sequence.sequence_model import SequenceGameRule as GameRule
-from Sequence.sequence_displayer import TextDisplayer,GUIDisplayer
 from template import Agent as DummyAgent
 from game import Game, GameReplayer
 from optparse import OptionParser
@@ -23,20 +23,32 @@ from optparse import OptionParser
 # CONSTANTS ----------------------------------------------------------------------------------------------------------#
 
 error_index= ["red_team_load","blue_team_load"]
+agent_workers = None # this process's agent worker processes, see agentWorkers()
 
 # CLASS DEF ----------------------------------------------------------------------------------------------------------#
 
+# agent classes already imported this run, by agent file path
+agent_classes = {}
+
+# Imports an agent module once per run and returns its myAgent class. An optional myAgent.prepare()
+# is called right after the import, so expensive setup (weights, tables) is paid once, not per game.
+def loadAgentClass(agent_file_path):
+    if agent_file_path not in agent_classes:
+        mymodule = importlib.import_module(agent_file_path)
+        agent_class = mymodule.myAgent
+        if hasattr(agent_class, "prepare"): # Agent.prepare by default does nothing
+            agent_class.prepare()
+        agent_classes[agent_file_path] = agent_class
+    return agent_classes[agent_file_path]
+
 def loadAgent(file_list,name_list,superQuiet = True):
     agents = [None]*4
     load_errs = {}
-    print(f"path is {file_list}")
     for i,agent_file_path in enumerate(file_list):
         agent_temp = None
-        print(f"path is {agent_file_path}")
 
         try:
-            mymodule = importlib.import_module(agent_file_path)
-            agent_temp = mymodule.myAgent(i)
+            agent_temp = loadAgentClass(agent_file_path)(i)
         except (NameError, ImportError, IOError):
             print('Error: The team "' + agent_file_path + '" could not be loaded! ', file=sys.stderr)
             traceback.print_exc()
@@ -82,14 +94,104 @@ class HidePrint:
         sys.stderr = sys.stdout
 
 
+# Loads the agents and plays one game of a run, returning (replay or None, load errors, file name).
+# Top-level so that it can be sent to worker processes with --jobs.
+def playGame(options,game_rule,agents_names,random_seed,displayer,valid_game,msg,game_idx):
+    #Load each agent twice, for two teams of two.
+    agents,load_errs = loadAgent([options.red, options.blue, options.red, options.blue], 
+                                  agents_names, superQuiet=options.superQuiet)
+    for i,err in load_errs.items():
+        msg += "{} {}\n".format(i,err)
+        if not options.superQuiet:
+            print(i,err)
+        valid_game = False
+    # agents that search with several processes may use up to this many during their turn
+    for agent in agents:
+        agent.search_workers = options.searchWorkers
+
+    f_name = agents_names[0]+'-vs-'+agents_names[1]+"-"+datetime.datetime.now().strftime("%d-%b-%Y-%H-%M-%S-%f")
+    # games played in parallel can start within the same microsecond, so their files also carry the game number
+    if options.jobs > 1:
+        f_name += "-game{}".format(game_idx+1)
+
+    # binary replays are streamed to their file while the game is played
+    replay_file = None
+    if options.saveGameRecord and options.replayFormat == 'binary':
+        if not os.path.exists(options.output):
+            os.makedirs(options.output)
+        replay_file = options.output+"/replay-"+f_name+".replay"
+
+    gr = Game(game_rule,
+                agents,
+                num_of_agent = options.num_of_agent,
+                seed=random_seed,
+                time_limit=options.warningTimeLimit,
+                warning_limit=options.numOfWarnings,
+                displayer=displayer,
+                agents_namelist=agents_names,
+                compact_actions=options.compactActions,
+                observation_views=options.observationViews,
+                agent_processes=options.agentProcesses,
+                agent_workers=agentWorkers(agents) if options.agentProcesses and valid_game else None,
+                replay_file=replay_file,
+                state_rng=options.stateRandom)
+    replay = None
+    if not options.print:
+        with HidePrint(options.saveLog,options.output,f_name):
+            print("Following are the print info for loading:\n{}\n".format(msg))
+            print("\n-------------------------------------\n")
+            print("Following are the print info from the game:\n")
+            if valid_game:          
+                replay = gr.Run()
+            else:
+                print("Invalid game. No game played.\n")
+    else:
+        print("Following are the print info for loading:\n{}\n".format(msg))
+        print("\n-------------------------------------\n")
+        print("Following are the print info from the game:\n")
+        if valid_game:      
+            replay = gr.Run()
+        else:
+            print("Invalid game. No game played.\n")
+    return replay,load_errs,f_name
+
+def playGameTask(args):
+    return playGame(*args)
+
+# With --agentProcesses, the games played by one process share a worker process per agent: each game hands its own
+# agents over to them. With --jobs, every process of the pool keeps its own.
+def agentWorkers(agents):
+    global agent_workers
+    if agent_workers is None:
+        from agent_worker import AgentWorker # imported only when agents run in worker processes
+        agent_workers = [AgentWorker(agent) for agent in agents]
+    return agent_workers
+
+def closeAgentWorkers():
+    global agent_workers
+    for worker in agent_workers or []:
+        worker.Close()
+    agent_workers = None
+
+
 def run(options,valid_game,msg):
 
-    # text displayer, will disable GUI
-    displayer = GUIDisplayer(options.delay)
+    # text displayer, will disable GUI; the displayer module (and tkinter, for the GUI) is only imported when needed
     if options.textgraphics:
+        from Sequence.sequence_displayer import TextDisplayer
         displayer = TextDisplayer()
     elif options.quiet or options.superQuiet:
         displayer = None
+    else:
+        from Sequence.sequence_displayer import GUIDisplayer
+        displayer = GUIDisplayer(options.delay)
+
+    # bitboard engine plays by the same rules, with chips stored as bit masks
+    # modules only some runs need (bitboards, replays, process pools) are imported where they are used
+    game_rule = GameRule
+    if options.bitboard:
+        from Sequence.sequence_bitboard import BitboardGameRule
+        game_rule = BitboardGameRule
 
     agents_names = [options.redName, options.blueName]*2
     for i in range(len(agents_names)):
@@ -104,95 +206,86 @@ def run(options,valid_game,msg):
     # make sure random seed is traceable
     random.seed(random_seed)
     seed_list = [random.randint(0,1e10) for _ in range(1000)]
-    seed_idx = 0
 
-    num_of_warning = options.numOfWarnings
     file_path = options.output
 
     if options.replay != None:
         if not options.superQuiet:
             print('Replaying recorded game %s.' % options.replay)
         replay_dir = options.replay
-        replay = pickle.load(open(replay_dir,'rb'),encoding="bytes")
-        GameReplayer(GameRule,replay,displayer).Run()
+        from Sequence.sequence_replay import LoadReplay # imported only when a replay is loaded
+        replay = LoadReplay(replay_dir) # either a pickled or a binary replay
+        replayer = GameReplayer(game_rule,replay,displayer)
+        replayer.seek(options.replayFrom)
+        replayer.Run()
     else: 
         games_results = [(0,0,0,0,0,0,0)]
         results = {"succ":valid_game}
-        for i in range(options.multipleGames):
-            #Load each agent twice, for two teams of two.
-            agents,load_errs = loadAgent([options.red, options.blue, options.red, options.blue], 
-                                          agents_names, superQuiet=options.superQuiet)
-            is_load_err = False
-            for i,err in load_errs.items():
-                msg += "{} {}\n".format(i,err)
-                if not options.superQuiet:
-                    print(i,err)
-                is_load_err = True
-        
-            random_seed=seed_list[seed_idx]
-            seed_idx += 1
-
-            if is_load_err:
-                results["load_errors"] = load_errs
-                results["succ"]=False
-                valid_game = False
-
-            f_name = agents_names[0]+'-vs-'+agents_names[1]+"-"+datetime.datetime.now().strftime("%d-%b-%Y-%H-%M-%S-%f")
-            
-            gr = Game(GameRule,
-                        agents,
-                        num_of_agent = options.num_of_agent,
-                        seed=random_seed,
-                        time_limit=options.warningTimeLimit,
-                        warning_limit=num_of_warning,
-                        displayer=displayer,
-                        agents_namelist=agents_names)
-            if not options.print:
-                with HidePrint(options.saveLog,file_path,f_name):
-                    print("Following are the print info for loading:\n{}\n".format(msg))
-                    print("\n-------------------------------------\n")
-                    print("Following are the print info from the game:\n")
-                    if valid_game:          
-                        replay = gr.Run()
-                    else:
-                        print("Invalid game. No game played.\n")
+        load_errs = {}
+        # with --jobs, games are spread over worker processes (without a displayer); results are still collected in game order
+        # import and prepare the agents once up front, so that --jobs workers inherit them ready to use
+        for agent_file_path in set([options.red, options.blue]):
+            try:
+                loadAgentClass(agent_file_path)
+            except:
+                pass # reported per game by loadAgent
+        results["startup_time"] = time.perf_counter() - START_TIME # seconds from launch until the first game can start
+        executor = None
+        if options.jobs > 1:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            displayer = None
+            # forked workers inherit the prepared agents; where fork is unavailable (Windows), they import them again
+            if 'fork' in multiprocessing.get_all_start_methods():
+                executor = ProcessPoolExecutor(options.jobs, mp_context=multiprocessing.get_context('fork'))
             else:
-                print("Following are the print info for loading:\n{}\n".format(msg))
-                print("\n-------------------------------------\n")
-                print("Following are the print info from the game:\n")
-                if valid_game:      
-                    replay = gr.Run()
-                else:
-                    print("Invalid game. No game played.\n")
-                    
-            if valid_game:
-                _,_,r_total,b_total,r_win,b_win,tie = games_results[len(games_results)-1]
-                r_score = replay["scores"][0] + replay["scores"][2] # Two teams of two players, so scores are summed.
-                b_score = replay["scores"][1] + replay["scores"][3]
-                if r_score==b_score:
-                    tie = tie + 1
-                elif r_score<b_score:
-                    b_win = b_win + 1
-                else:
-                    r_win = r_win + 1
-
-                # adding this to avoid -1 in the score
-                r_score = max(r_score,0)
-                b_score = max(b_score,0)
-                r_total = r_total+r_score
-                b_total = b_total+b_score
-                if not options.superQuiet:
-                    print("Result of game ({}/{}): Agent {} earned {} points; Agent {} earned {} points\n".format(i+1,options.multipleGames,agents_names[0],r_score,agents_names[1],b_score))
-                games_results.append((r_score,b_score,r_total,b_total,r_win,b_win,tie))
-
-                if options.saveGameRecord:
-                    if not os.path.exists(file_path):
-                        os.makedirs(file_path)
+                executor = ProcessPoolExecutor(options.jobs)
+        # the pool and any agent worker processes are shut down even if a game raises
+        try:
+            games = [(options, game_rule, agents_names, seed_list[i], displayer, valid_game, msg, i)
+                     for i in range(options.multipleGames)]
+            outcomes = executor.map(playGameTask, games) if executor else map(playGameTask, games)
+
+            for i,(replay,errs,f_name) in enumerate(outcomes):
+                if errs:
+                    load_errs = errs
+                    results["load_errors"] = load_errs
+                    results["succ"]=False
+                    valid_game = False
+
+                if valid_game:
+                    _,_,r_total,b_total,r_win,b_win,tie = games_results[len(games_results)-1]
+                    r_score = replay["scores"][0] + replay["scores"][2] # Two teams of two players, so scores are summed.
+                    b_score = replay["scores"][1] + replay["scores"][3]
+                    if r_score==b_score:
+                        tie = tie + 1
+                    elif r_score<b_score:
+                        b_win = b_win + 1
+                    else:
+                        r_win = r_win + 1
+
+                    # adding this to avoid -1 in the score
+                    r_score = max(r_score,0)
+                    b_score = max(b_score,0)
+                    r_total = r_total+r_score
+                    b_total = b_total+b_score
                     if not options.superQuiet:
-                        print("Game ({}/{}) has been recorded!\n".format(i+1,options.multipleGames))
-                    record = pickle.dumps(replay)
-                    with open(file_path+"/replay-"+f_name+".replay",'wb') as f:
-                        f.write(record)
+                        print("Result of game ({}/{}): Agent {} earned {} points; Agent {} earned {} points\n".format(i+1,options.multipleGames,agents_names[0],r_score,agents_names[1],b_score))
+                    games_results.append((r_score,b_score,r_total,b_total,r_win,b_win,tie))
+
+                    if options.saveGameRecord:
+                        if not os.path.exists(file_path):
+                            os.makedirs(file_path)
+                        if not options.superQuiet:
+                            print("Game ({}/{}) has been recorded!\n".format(i+1,options.multipleGames))
+                        if options.replayFormat != 'binary': # binary replays were written during the game
+                            record = pickle.dumps(replay)
+                            with open(file_path+"/replay-"+f_name+".replay",'wb') as f:
+                                f.write(record)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            closeAgentWorkers()
             
         if valid_game:
             _,_,r_total,b_total,r_win,b_win,tie = games_results[len(games_results)-1]
@@ -252,9 +345,18 @@ def loadParameter():
     parser.add_option('-o','--output', help='output directory for replay and log (default: output)',default='output')
     parser.add_option('-l','--saveLog', action='store_true',help='Writes agent printed information into a log file(named by the time they were played)', default=False)
     parser.add_option('--replay', default=None, help='Replays a recorded game file by a relative path')
+    parser.add_option('--replayFrom', type='int', help='Start the replay after this many moves (default: 0)', default=0)
+    parser.add_option('--replayFormat', type='choice', choices=['pickle','binary'], help='Format of recorded games: pickle, or binary, which is written move by move (default: pickle)', default='pickle')
     parser.add_option('--delay', type='float', help='Delay action in a play or replay by input (float) seconds (default 0.1)', default=0.1)
     parser.add_option('-p','--print', action='store_true', help='Print all the output in terminal when playing games, will diable \'-l\' automatically. (default: False)', default=False)
     parser.add_option('--num_of_agent', type='int',help='num_of_agent', default=4)
+    parser.add_option('-j', '--jobs', type='int', help='Number of processes to play multiple games in parallel, without a displayer (default: 1)', default=1)
+    parser.add_option('--compactActions', action='store_true', help='Give agents a factorised action space instead of a list of actions (default: False)', default=False)
+    parser.add_option('--observationViews', action='store_true', help='Give agents copy-on-write views of the game state instead of deep copies (default: False)', default=False)
+    parser.add_option('--agentProcesses', action='store_true', help='Run each agent in its own worker process, killed and restarted if it overruns the time limit (default: False)', default=False)
+    parser.add_option('--stateRandom', action='store_true', help='Deal from an RNG kept in the game state, so agents using the random module cannot change the game; the same seed then plays a different game (default: False)', default=False)
+    parser.add_option('--bitboard', action='store_true', help='Use the bitboard-backed game engine (default: False)', default=False)
+    parser.add_option('--searchWorkers', type='int', help='Number of processes an agent may use for its search during its turn, e.g. root-parallel MCTS (default: 1)', default=1)
 
 
     options, otherjunk = parser.parse_args(sys.argv[1:] )
@@ -1,5 +1,7 @@
 import utils
 import random
+import time
+import collections
 
 
 class GameState:
@@ -12,7 +14,10 @@ class Action:
 
 
 class GameRule:
-    def __init__(self, num_of_agent = 2):
+    # With a seed, the game's randomness (e.g. dealing) comes from RNGs
+    # kept in the game state and seeded from it, not the random module.
+    def __init__(self, num_of_agent = 2, seed = None):
+        self.seed = seed
         self.perfect_information = True
         self.current_agent_index = 0
         self.num_of_agent = num_of_agent
@@ -53,10 +58,26 @@ class GameRule:
         return self.current_agent_index
 
 class Agent(object):
+    # Set by Game before each SelectAction call: the time.monotonic()
+    # value by which the action must be returned (None for no limit),
+    # and how many more warnings the agent can get before it loses.
+    deadline = None
+    warnings_left = None
+    # Set by the runner (--searchWorkers): how many processes the agent
+    # may use for its search during its turn.
+    search_workers = 1
+
     def __init__(self, _id):
         self.id = _id
         super().__init__()
 
+    # Called once per run, before the first game and before any agent of
+    # this class is created, for setup worth sharing across games
+    # (loading weights, building tables).
+    @classmethod
+    def prepare(cls):
+        pass
+
     # Given a set of available actions for the agent to execute, and
     # a copy of the current game state (including that of the agent),
     # select one of the actions to execute. 
@@ -64,6 +85,41 @@ class Agent(object):
         return random.choice(actions)
 
 
+# Spreads an agent's search over the time it has for a move. Search
+# code calls keepGoing() wherever it could stop: once per iteration,
+# and inside iterations long enough to matter. It measures the time
+# between calls, and says stop as soon as the next stretch of work, as
+# long as the longest of the last `window`, would not end before the
+# deadline. From then on expired() is True, so partly done work can be
+# thrown away. `margin` seconds are kept back for returning the action.
+# Without a deadline (e.g. when the agent is run outside Game), `budget`
+# seconds from now are used instead.
+class TimeManager:
+    def __init__(self, deadline=None, budget=0.9, margin=0.03, window=10):
+        self.start = time.monotonic()
+        if deadline is None:
+            deadline = self.start + budget
+        self.deadline = deadline - margin
+        self.last = self.start
+        self.recent = collections.deque(maxlen=window)
+        self.stopped = False
+
+    def timeLeft(self):
+        return self.deadline - time.monotonic()
+
+    def expired(self):
+        return self.stopped or time.monotonic() >= self.deadline
+
+    def keepGoing(self):
+        if self.stopped:
+            return False
+        now = time.monotonic()
+        self.recent.append(now - self.last)
+        self.last = now
+        self.stopped = now + max(self.recent) >= self.deadline
+        return not self.stopped
+
+
 class Displayer:
     def __init__(self):
         pass
@@ -0,0 +1,31 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Shared setup of the tests: the modules are imported from the repository root, as the runner does.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Everything held by an object, as plain lists and dicts that compare with ==.
+def StateDump(obj):
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, random.Random):
+        return obj.getstate()
+    if isinstance(obj, (list, tuple)):
+        return [StateDump(item) for item in obj]
+    if isinstance(obj, dict):
+        return {key:StateDump(value) for key,value in obj.items()}
+    if hasattr(obj, '__dict__'):
+        return {key:StateDump(value) for key,value in vars(obj).items()}
+    return {key:StateDump(getattr(obj, key)) for key in obj.__slots__ if hasattr(obj, key)}
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,146 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of the agent worker processes: time limits and the grace kill, crashes, hidden attributes, and one
+#          worker serving several games.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import os
+import sys
+import time
+import pickle
+import threading
+import random
+import pytest
+from func_timeout import FunctionTimedOut
+from conftest import StateDump
+from agent_worker import AgentWorker, EncodeRequest
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceGameRule
+from Sequence.sequence_bitboard import BitboardGameRule
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#Sleeps for as long as it is told to, then answers with its pid, its tag and what it was sent.
+class SleepyAgent:
+    def __init__(self, tag='first'):
+        self.tag = tag
+
+    def SelectAction(self, actions, game_state):
+        if game_state.get('exit'):
+            os._exit(1)
+        if game_state.get('raise'):
+            raise ValueError('bad move')
+        if game_state.get('print'):
+            print(game_state['print'])
+        if game_state.get('info'):
+            return (self.deadline, self.warnings_left)
+        time.sleep(game_state.get('sleep', 0))
+        return (os.getpid(), self.tag, actions)
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+@pytest.fixture
+def worker():
+    worker = AgentWorker(SleepyAgent(), grace=0.2)
+    yield worker
+    worker.Close()
+
+def waitUntilDead(process, timeout=2.0):
+    end = time.monotonic() + timeout
+    while process.is_alive() and time.monotonic() < end:
+        time.sleep(0.01)
+    return not process.is_alive()
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+def test_answers_come_from_one_long_lived_process(worker):
+    pids = {worker.SelectAction([1, 2], {}, 5, move)[0] for move in range(5)}
+    assert pids == {worker.process.pid} and pids != {os.getpid()}
+    assert worker.SelectAction([1, 2], {}, 5, 5)[2] == [1, 2]
+
+def test_agent_is_told_its_deadline(worker):
+    start = time.monotonic()
+    deadline,warnings_left = worker.SelectAction([], {'info':True}, 5, 0, warnings_left=2)
+    assert start+5 <= deadline <= time.monotonic()+5 and warnings_left == 2
+
+def test_overrunning_worker_is_killed_once_its_grace_period_ends(worker):
+    process = worker.process
+    start   = time.monotonic()
+    with pytest.raises(FunctionTimedOut):
+        worker.SelectAction([], {'sleep':30}, 0.05, 0)
+    assert time.monotonic() - start < 1
+    #Nobody asks the worker for anything else, yet it is killed at the end of the grace period.
+    assert waitUntilDead(process)
+    assert worker.restarts == 0
+
+    #The next request restarts it.
+    pid,_,_ = worker.SelectAction([], {}, 5, 1)
+    assert worker.restarts == 1 and pid == worker.process.pid != process.pid
+
+def test_late_reply_within_the_grace_period_keeps_the_worker(worker):
+    process = worker.process
+    with pytest.raises(FunctionTimedOut):
+        worker.SelectAction([], {'sleep':0.1}, 0.02, 0)
+    pid,_,_ = worker.SelectAction([], {}, 5, 1)
+    assert worker.restarts == 0 and pid == process.pid
+
+def test_agent_exceptions_are_raised_in_the_referee(worker):
+    with pytest.raises(ValueError, match='bad move') as info:
+        worker.SelectAction([], {'raise':True}, 5, 0)
+    assert 'bad move' in info.value.worker_traceback
+    assert worker.SelectAction([], {}, 5, 1)[1] == 'first'
+
+def test_crashed_worker_is_restarted(worker):
+    with pytest.raises(RuntimeError, match='exited'):
+        worker.SelectAction([], {'exit':True}, 5, 0)
+    assert worker.restarts == 1
+    assert worker.SelectAction([], {}, 5, 1)[1] == 'first'
+
+#The worker's output follows the referee's stdout from game to game, as the runner's per-game logs need.
+def test_one_worker_serves_several_games(worker, tmp_path, monkeypatch):
+    pid = worker.process.pid
+    log = tmp_path/'game.log'
+    with open(log, 'w') as f:
+        monkeypatch.setattr(sys, 'stdout', f)
+        worker.NewGame(SleepyAgent('second'))
+        assert worker.SelectAction([], {'print':'from the worker'}, 5, 0)[:2] == (pid, 'second')
+        monkeypatch.undo()
+    assert 'from the worker' in log.read_text()
+
+    #An agent that cannot be pickled gets a worker of its own.
+    agent = SleepyAgent('third')
+    agent.lock = threading.Lock()
+    worker.NewGame(agent)
+    new_pid,tag,_ = worker.SelectAction([], {}, 5, 0)
+    assert tag == 'third' and new_pid != pid
+
+@pytest.mark.parametrize('game_rule_class', [SequenceGameRule, BitboardGameRule])
+def test_requests_are_compact_and_leave_out_hidden_attributes(game_rule_class):
+    random.seed(3)
+    game_rule = game_rule_class(4)
+    for _ in range(20):
+        agent_id = game_rule.getCurrentAgentIndex()
+        game_rule.update(random.choice(game_rule.getLegalActions(game_rule.current_game_state, agent_id)))
+    state  = game_rule.current_game_state
+    before = StateDump(state)
+    hidden = {'deck':{'cards':True}, 'agents':{i:{'hand':True} for i in (1, 3)}}
+    space  = game_rule.getActionSpace(state, 0)
+
+    request = EncodeRequest(7, space, state, hidden, as_list=True)
+    assert len(request) < len(pickle.dumps((7, game_rule.getLegalActions(state, 0), state), pickle.HIGHEST_PROTOCOL))
+    move,actions,sent,as_list,info = pickle.loads(request)
+    assert StateDump(state) == before
+    assert (move, as_list, info) == (7, True, {}) and list(actions) == game_rule.getLegalActions(state, 0)
+    assert not hasattr(sent.deck, 'cards') and sent.deck.discards == state.deck.discards
+    assert [hasattr(agent, 'hand') for agent in sent.agents] == [True, False, True, False]
+    assert [list(row) for row in sent.board.chips] == [list(row) for row in state.board.chips]
+    assert sent.board.window_counts == state.board.window_counts
+    del state.deck.cards
+    for i in (1, 3):
+        del state.agents[i].hand
+    assert StateDump(sent) == StateDump(state)
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
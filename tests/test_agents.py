@@ -0,0 +1,158 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of the search agents of agents/Group_28: moves made with almost no time left, and trees kept from one
+#          turn to the next, the array-backed tree they search, root-parallel searches, and the determinisations of
+#          the information-set search.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import copy
+import time
+import random
+import importlib
+import pytest
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceGameRule
+from collections import Counter
+from conftest import StateDump
+from template import TimeManager
+from agents.Group_28.mctsTree import NodeStore, RootParallel, ROOT
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+#Less time is left than the time manager's margin, so the search stops before its first iteration.
+@pytest.mark.parametrize('name', ['Mcts', 'Mcts2', 'Mcts_UCB', 'blindSearch', 'Ismcts'])
+def test_agent_moves_past_margin(name):
+    module = importlib.import_module('agents.Group_28.'+name)
+    rule = SequenceGameRule(4, seed=5)
+    rng = random.Random(5)
+    for _ in range(12):
+        rule.update(rng.choice(rule.getLegalActions(rule.current_game_state, rule.current_agent_index)))
+    agent_id = rule.current_agent_index
+    actions = rule.getLegalActions(rule.current_game_state, agent_id)
+    agent = module.myAgent(agent_id)
+    agent.deadline = time.monotonic() + 0.01
+    assert agent.SelectAction(actions, rule.current_game_state) in actions
+
+#Mcts2 plays seat 0 against random moves. Its tree is recognised when the game went as the tree expects, and dropped
+#as soon as the board differs.
+def test_mcts2_keeps_its_tree_while_the_game_goes_as_expected():
+    module = importlib.import_module('agents.Group_28.Mcts2')
+    rule = SequenceGameRule(4, seed=8)
+    rng = random.Random(8)
+    agent = module.myAgent(0)
+    recognised = 0
+    for _ in range(40):
+        state, agent_id = rule.current_game_state, rule.current_agent_index
+        actions = rule.getLegalActions(state, agent_id)
+        if agent_id == 0:
+            kept = agent.tree
+            recognised += agent.reusableTree(state) is not None
+            if kept is not None and actions[0]['type'] != 'trade':
+                changed = copy.deepcopy(state)
+                r,c = changed.board.empty_coords[0]
+                changed.board.chips[r][c] = BLU
+                agent.tree = kept
+                assert agent.reusableTree(changed) is None
+            agent.tree = kept
+            agent.deadline = time.monotonic() + 0.1
+            action = agent.SelectAction(actions, state)
+        else:
+            action = rng.choice(actions)
+        rule.update(action)
+    assert recognised >= 5
+
+#States are tuples of the action indices played, and every step is counted. The states kept along the last path are
+#reused, whatever order the nodes are asked for in.
+def test_node_states_replay_their_paths():
+    steps = []
+    def step(state, action):
+        steps.append(action)
+        return state + (action,)
+    tree = NodeStore((), step)
+    rng = random.Random(3)
+    leaves = [ROOT]
+    for _ in range(30):
+        node = leaves.pop(rng.randrange(len(leaves)))
+        leaves.extend(tree.expand(node, rng.randint(1, 4)))
+    for node in [rng.randrange(len(tree)) for _ in range(200)]:
+        del steps[:]
+        assert tree.state(node) == tuple(tree.path(node))
+        assert len(steps) <= len(tree.path(node))
+    deepest = max(range(len(tree)), key=lambda node: len(tree.path(node)))
+    tree.state(deepest)
+    del steps[:]
+    assert tree.state(tree.parent[deepest]) == tuple(tree.path(deepest)[:-1]) and steps == []
+    with pytest.raises(ValueError):
+        tree.path(-1)
+
+#Two trees that backpropagate different rewards into the same root merge into the tree that got all the rewards.
+@pytest.mark.parametrize('average', [True, False])
+def test_merged_root_holds_both_searches(average):
+    def backPropagate(tree, node, reward):
+        for node in (node, ROOT):
+            tree.visits[node] += 1
+            if average:
+                tree.value[node] += (reward - tree.value[node]) / tree.visits[node]
+            else:
+                tree.value[node] += reward
+    trees = [NodeStore((), None) for _ in range(3)]
+    for tree in trees:
+        tree.expand(ROOT, 3)
+    rng = random.Random(4)
+    for i in range(40):
+        node, reward = rng.choice(trees[0].children(ROOT)), rng.random()
+        backPropagate(trees[i%2], node, reward)
+        backPropagate(trees[2], node, reward)
+    trees[0].mergeRoot(trees[1].rootStats(), average)
+    assert list(trees[0].visits) == list(trees[2].visits)
+    assert list(trees[0].value) == pytest.approx(list(trees[2].value))
+
+#The workers' statistics arrive before the deadline, and add to the iterations of the agent's own search.
+def test_root_parallel_search_merges_the_workers():
+    module = importlib.import_module('agents.Group_28.Mcts')
+    rule = SequenceGameRule(4, seed=6)
+    state, agent_id = rule.current_game_state, rule.current_agent_index
+    actions = rule.getLegalActions(state, agent_id)
+    search = module.MCTS(actions, state, state.agents[agent_id].colour)
+    parallel = RootParallel()
+    time_manager = TimeManager(budget=0.3)
+    pending = parallel.start(module.searchRoot, (search.rootState(), search._player_color), time_manager, 3)
+    tree = search.mcts(time_manager)
+    own = tree.visits[ROOT]
+    results = parallel.collect(pending, time_manager)
+    RootParallel.close()
+    assert len(results) == 2
+    for stats in results:
+        tree.mergeRoot(stats)
+    assert tree.visits[ROOT] == own + sum(stats[0]-1 for stats in results)
+    assert search.lastAction(search.findBest_child()) in actions
+
+#Every determinisation deals two whole decks, keeps the agent's own hand, and gives the other agents the cards they
+#are known to hold. Each iteration leaves the working state as it found it.
+def test_ismcts_deals_consistent_hands_and_undoes_its_iterations():
+    module = importlib.import_module('agents.Group_28.Ismcts')
+    rule = SequenceGameRule(4, seed=2)
+    rng = random.Random(2)
+    for _ in range(30):
+        rule.update(rng.choice(rule.getLegalActions(rule.current_game_state, rule.current_agent_index)))
+    state, agent_id = rule.current_game_state, rule.current_agent_index
+    search = module.ISMCTS(SequenceGameRule(4), state, agent_id)
+    for _ in range(30):
+        search.determinise()
+        dealt = search._state
+        cards = Counter(dealt.deck.cards + dealt.deck.discards + dealt.board.draft)
+        for agent in dealt.agents:
+            cards.update(agent.hand)
+        assert cards == Counter(module.CARDS*2)
+        assert dealt.agents[agent_id].hand == state.agents[agent_id].hand
+        for other,known in search._known.items():
+            assert not Counter(known) - Counter(dealt.agents[other].hand)
+        before = StateDump(dealt)
+        search.iterate()
+        assert StateDump(dealt) == before
+    assert sum(child.visits for child in search._root.children.values()) == 30
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
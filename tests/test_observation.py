@@ -0,0 +1,108 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of the copy-on-write observation views: agent writes stay in the view, and copies of a view are plain.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import copy
+import pickle
+import random
+import pytest
+from conftest import StateDump
+from observation import ObservationView, ObjectView, ListView, DictView
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceState, SequenceGameRule
+from Sequence.sequence_bitboard import BitboardGameRule, BitBoardState
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#A game state a few random moves in, so that the board, coordinates and traces are not all empty.
+def playedState(game_rule_class, seed, moves=12):
+    random.seed(seed)
+    game_rule = game_rule_class(4)
+    for _ in range(moves):
+        agent_id = game_rule.getCurrentAgentIndex()
+        game_rule.update(random.choice(game_rule.getLegalActions(game_rule.current_game_state, agent_id)))
+    return game_rule.current_game_state
+
+#The spec Game uses for agent 0: the deck and the other agents' hands are hidden.
+def hiddenFor(state, agent_index=0):
+    return {'deck':{'cards':True},
+            'agents':{i:{'hand':True} for i in range(len(state.agents)) if state.agents[i].id != agent_index}}
+
+#Every kind of write an agent might make, through object, list and dict views alike.
+def scribble(view):
+    view.agents[0].hand.append('zz')
+    view.agents[0].score = 99
+    view.agents[0].agent_trace.action_reward.append(('x', 0))
+    del view.agents[2].seq_orientations
+    view.agents[3] = None
+    view.board.draft.pop()
+    view.board.chips[4][4] = RED
+    view.board.chips[5] = [EMPTY]*10
+    view.board.plr_coords[RED].append((0, 0))
+    view.board.plr_coords[BLU] = []
+    del view.board.window_counts[RED]
+    view.board.new_seq = True
+    view.deck.discards.clear()
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+@pytest.mark.parametrize('game_rule_class', [SequenceGameRule, BitboardGameRule])
+def test_writes_never_reach_the_master_state(game_rule_class):
+    state  = playedState(game_rule_class, 1)
+    before = StateDump(state)
+    view   = ObservationView(state, hiddenFor(state))
+    scribble(view)
+    assert StateDump(state) == before
+
+    #The view itself does see its own writes.
+    assert view.agents[0].hand[-1] == 'zz' and view.agents[0].score == 99
+    assert view.agents[3] is None
+    assert view.board.chips[4][4] == RED and view.board.chips[5] == [EMPTY]*10
+    assert view.board.plr_coords[BLU] == [] and RED not in view.board.window_counts
+    assert not hasattr(view.agents[2], 'seq_orientations')
+
+def test_views_hide_private_attributes():
+    state = playedState(SequenceGameRule, 2)
+    view  = ObservationView(state, hiddenFor(state))
+    assert isinstance(view, ObjectView) and isinstance(view.agents, ListView)
+    assert isinstance(view.board.plr_coords, DictView)
+    assert view.agents[0].hand == state.agents[0].hand
+    assert not hasattr(view.deck, 'cards')
+    for i in range(1, 4):
+        with pytest.raises(AttributeError):
+            view.agents[i].hand
+    assert 'cards' not in StateDump(copy.deepcopy(view).deck)
+
+@pytest.mark.parametrize('game_rule_class', [SequenceGameRule, BitboardGameRule])
+def test_copies_of_a_view_are_plain_and_independent(game_rule_class):
+    state = playedState(game_rule_class, 3)
+    view  = ObservationView(state, hiddenFor(state))
+    view.agents[0].score = 99
+    for plain in (copy.deepcopy(view), copy.copy(view), pickle.loads(pickle.dumps(view))):
+        assert type(plain) is SequenceState
+        assert type(plain.agents) is list and type(plain.agents[0]) is SequenceState.AgentState
+        assert type(plain.board.plr_coords) is dict
+        assert plain.agents[0].score == 99
+
+    plain  = copy.deepcopy(view)
+    before = StateDump(state)
+    seen   = StateDump(view)
+    scribble(plain)
+    assert StateDump(state) == before
+    assert StateDump(view) == seen
+
+def test_bitboards_are_cloned_not_deep_copied():
+    state = playedState(BitboardGameRule, 4)
+    board = ObservationView(state).board
+    assert type(board) is BitBoardState and board is not state.board
+    masks = dict(state.board.masks)
+    r,c   = state.board.empty_coords[0]
+    board.setChip(r, c, RED)
+    assert state.board.masks == masks and state.board.chips[r][c] == EMPTY
+    assert board.chips[r][c] == RED
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,63 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of replay_export: every move of a recorded game becomes one row, holding the position it was played
+#          from, and the rows are split into chunks in file order.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import os
+import pickle
+import optparse
+import pytest
+np = pytest.importorskip('numpy')
+from game import Game, GameReplayer
+from Sequence.sequence_model import SequenceGameRule
+from agents.samples.random import myAgent
+import replay_export
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+def recordGames(directory, seeds):
+    histories = []
+    for i,seed in enumerate(seeds):
+        path = os.path.join(directory, "game{}.replay".format(i))
+        game = Game(SequenceGameRule, [myAgent(j) for j in range(4)], 4, seed=seed, time_limit=None,
+                    agents_namelist=["a","b","c","d"], replay_file=path if i%2 else None)
+        history = game.Run()
+        if not i%2: #Pickled and binary replays alike.
+            with open(path, 'wb') as f:
+                f.write(pickle.dumps(history))
+        histories.append(history)
+    return histories
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+def test_rows_hold_the_positions_played(tmp_path):
+    histories = recordGames(str(tmp_path), [1, 2, 3])
+    output = str(tmp_path / "dataset")
+    options = optparse.Values({'input':str(tmp_path / "*.replay"), 'output':output, 'chunkSize':50, 'jobs':1,
+                               'quiet':True})
+    num_chunks = replay_export.run(options)
+
+    chunks = sorted(d for d in os.listdir(output) if d.startswith("chunk-"))
+    assert len(chunks) == num_chunks
+    arrays = {name:np.concatenate([np.load(os.path.join(output, d, name+".npy")) for d in chunks])
+              for name in replay_export.ARRAYS}
+    assert all(len(np.load(os.path.join(output, d, "games.npy"))) == 50 for d in chunks[:-1])
+    assert len(arrays['games']) == sum(len(history["actions"]) for history in histories)
+
+    #The first game's rows, checked against a replay of it.
+    replayer = GameReplayer(SequenceGameRule, histories[0], snapshot_interval=None)
+    for row,item in enumerate(histories[0]["actions"]):
+        (_, info), = item.items()
+        state = replayer.game_rule.current_game_state
+        for r,c in [(0,0), (4,5), (9,9)]:
+            assert arrays['boards'][row, replay_export.PLANE_INDEX[state.board.chips[r][c]], r, c] == 1
+        assert arrays['boards'][row].sum() == 100
+        assert arrays['agents'][row] == info["agent_id"] and arrays['games'][row] == 0
+        assert list(arrays['actions'][row]) == replay_export.encodeAction(info["action"])
+        replayer.step()
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,54 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of the NumPy batch engine: whole games against SequenceGameRule, and the vectorised sequence scoring
+#          against checkSeq on crowded boards, where sequences overlap and lines run to 9 chips.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import random
+import pytest
+np = pytest.importorskip('numpy')
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceState, SequenceGameRule
+from Sequence.sequence_batch import BatchGame, CrossCheck, CHIPS, CHIP_CODE, JOKER_CELLS
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+def test_batch_games_follow_the_reference_engine():
+    assert CrossCheck(num_games=10, seed=3) > 0
+
+def test_sequences_are_scored_as_checkSeq_scores_them():
+    rng   = random.Random(0)
+    rule  = SequenceGameRule(4)
+    batch = BatchGame(400, 4, seed=0)
+    agents, cells, expected = [], [], []
+    for n in range(batch.num_games):
+        agent = rng.randrange(4)
+        plr_state = SequenceState.AgentState(agent)
+        #Mostly the agent's own chips and sequence chips, so that most placements complete one sequence or more.
+        chips = [[rng.choice([plr_state.colour]*4 + [plr_state.seq_colour]*2 + [plr_state.opp_colour, EMPTY])
+                  for _ in range(10)] for _ in range(10)]
+        for cell in JOKER_CELLS:
+            chips[cell//10][cell%10] = JOKER
+        cell = rng.choice([cell for cell in range(100) if cell not in JOKER_CELLS])
+        chips[cell//10][cell%10] = plr_state.colour
+        batch.boards[n] = [[CHIP_CODE[chip] for chip in row] for row in chips]
+
+        seq,_ = rule.checkSeq(chips, plr_state, divmod(cell, 10))
+        for coords in (seq['coords'] if seq else []):
+            for r,c in coords:
+                if chips[r][c] != JOKER:
+                    chips[r][c] = plr_state.seq_colour
+        agents.append(agent)
+        cells.append(cell)
+        expected.append((chips, seq['num_seq'] if seq else 0))
+
+    batch._scoreSequences(np.arange(batch.num_games), np.array(agents), np.array(cells))
+    assert sum(num_seq > 1 for _,num_seq in expected) > 50
+    for n,(chips,num_seq) in enumerate(expected):
+        assert [[CHIPS[code] for code in row] for row in batch.boards[n].tolist()] == chips, n
+        assert batch.seqs[n, agents[n]] == num_seq, n
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,87 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of the bitboard engine against the list-based one: same moves, same sequences, masks kept in step.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import copy
+import pickle
+import random
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceState, SequenceGameRule, COORDS, WindowCounts
+from Sequence.sequence_bitboard import BitboardGameRule, BitBoardState, CHIP_TYPES, CELL_BIT
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#True if every cell is set in the mask of its chip, and in no other.
+def masksMatch(board):
+    for r in range(10):
+        for c in range(10):
+            if [chip for chip in CHIP_TYPES if board.masks[chip] & CELL_BIT[r][c]] != [board.chips[r][c]]:
+                return False
+    return True
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+def test_same_games_on_both_engines():
+    for seed in range(6):
+        random.seed(seed)
+        rule = SequenceGameRule(4)
+        random.seed(seed)
+        bitrule = BitboardGameRule(4)
+        rng = random.Random(seed)
+        while not rule.gameEnds():
+            state, bitstate = rule.current_game_state, bitrule.current_game_state
+            actions = rule.getLegalActions(state, rule.current_agent_index)
+            assert bitrule.getLegalActions(bitstate, bitrule.current_agent_index) == actions
+            action = rng.choice(actions)
+            move_seed = rng.random()
+            for game_rule in [rule, bitrule]: #Both decks deal from the random module, so both get the same seed.
+                random.seed(move_seed)
+                game_rule.update(action)
+            assert [list(row) for row in bitstate.board.chips] == state.board.chips
+            assert bitstate.board.plr_coords == state.board.plr_coords
+            assert [plr.completed_seqs for plr in bitstate.agents] == [plr.completed_seqs for plr in state.agents]
+            assert masksMatch(bitstate.board)
+            assert bitstate.board.window_counts == WindowCounts(bitstate.board.chips)
+        assert bitrule.gameEnds()
+
+def test_check_seq_matches_list_engine():
+    rng = random.Random(0)
+    rule, bitrule = SequenceGameRule(4), BitboardGameRule(4)
+    plr_states = SequenceState(4).agents[:2]
+    cells = [(r,c) for r in range(10) for c in range(10) if (r,c) not in COORDS['jk']]
+    for _ in range(1000):
+        plr_state = rng.choice(plr_states)
+        coords = rng.choice(cells)
+        board = SequenceState.BoardState()
+        for r,c in rng.sample(cells, rng.randint(20, 90)):
+            board.chips[r][c] = rng.choice([RED, RED, BLU, BLU, RED_SEQ, BLU_SEQ])
+        board.chips[coords[0]][coords[1]] = plr_state.colour #The chip just placed.
+        bitboard = BitBoardState.fromBoard(board)
+        expected = rule.checkSeq(board.chips, plr_state, coords)
+        window_counts = WindowCounts(board.chips)[plr_state.colour]
+        assert bitrule.checkSeq(bitboard.chips, plr_state, coords) == expected
+        assert bitrule.checkSeq(bitboard.chips, plr_state, coords, window_counts) == expected
+
+def test_copies_are_independent():
+    random.seed(1)
+    rule = BitboardGameRule(4)
+    for _ in range(20):
+        rule.update(random.choice(rule.getLegalActions(rule.current_game_state, rule.current_agent_index)))
+    board = rule.current_game_state.board
+    chips = [list(row) for row in board.chips]
+
+    loaded = pickle.loads(pickle.dumps(board))
+    assert loaded.masks == board.masks and loaded.chips == chips and masksMatch(loaded)
+    loaded.chips[1][1] = RED_SEQ
+    assert masksMatch(loaded) and board.chips == chips and masksMatch(board)
+
+    scratch = copy.deepcopy(board.chips)
+    assert type(scratch) is list and type(scratch[0]) is list
+    scratch[2][2] = BLU_SEQ
+    assert board.chips == chips
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
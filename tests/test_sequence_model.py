@@ -0,0 +1,192 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of SequenceGameRule and the state it keeps.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import copy
+import pickle
+import random
+import pytest
+from conftest import StateDump
+from Sequence.sequence_utils import *
+from Sequence.sequence_model import SequenceState, SequenceGameRule, Action, COORDS, CARDS, WindowCounts, \
+                                    EmptyCounts, ZobristHash, IsTerminal, TeamScore, IsDeadCard, SampleLegalAction
+from Sequence.sequence_bitboard import BitboardGameRule
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+#Plays random games, yielding the rule after every move.
+def randomGames(num_games, game_rule=SequenceGameRule):
+    for seed in range(num_games):
+        random.seed(seed)
+        rule = game_rule(4)
+        rng = random.Random(seed)
+        while not rule.gameEnds():
+            rule.update(rng.choice(rule.getLegalActions(rule.current_game_state, rule.current_agent_index)))
+            yield rule
+
+#Applies up to `depth` random legal moves in a row to state, yielding the agent to move after each.
+def applyMoves(rule, state, agent_id, depth, rng, records):
+    for _ in range(depth):
+        actions = rule.getLegalActions(state, agent_id)
+        if not actions:
+            return
+        action = rng.choice(actions)
+        records.append(rule.apply(state, action, agent_id))
+        if action['type'] != 'trade':
+            agent_id = (agent_id+1) % len(state.agents)
+        yield agent_id
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+def test_window_counts_follow_the_board():
+    for rule in randomGames(6):
+        board = rule.current_game_state.board
+        assert board.window_counts == WindowCounts(board.chips)
+
+@pytest.mark.parametrize('game_rule', [SequenceGameRule, BitboardGameRule])
+def test_empty_counts_follow_the_board(game_rule):
+    for rule in randomGames(4, game_rule):
+        state = rule.current_game_state
+        assert state.board.empty_counts == EmptyCounts(state.board.chips)
+        if hasattr(state.board, 'clone'): #Bitboards copy their counts along with the masks.
+            assert state.board.clone().empty_counts is not state.board.empty_counts
+        for card in CARDS: #The scan getActionSpace used to make for every card in hand.
+            dead = card[0]!='j' and all(state.board.chips[r][c]!=EMPTY for r,c in COORDS[card])
+            assert IsDeadCard(state, card) == dead
+
+def test_window_counts_only_skip_empty_scans():
+    rng = random.Random(0)
+    rule = SequenceGameRule(4)
+    plr_states = SequenceState(4).agents[:2]
+    cells = [(r,c) for r in range(10) for c in range(10) if (r,c) not in COORDS['jk']]
+    for _ in range(1000):
+        plr_state = rng.choice(plr_states)
+        coords = rng.choice(cells)
+        board = SequenceState.BoardState()
+        for r,c in rng.sample(cells, rng.randint(20, 90)):
+            board.chips[r][c] = rng.choice([RED, RED, BLU, BLU, RED_SEQ, BLU_SEQ])
+        board.chips[coords[0]][coords[1]] = plr_state.colour #The chip just placed.
+        window_counts = WindowCounts(board.chips)[plr_state.colour]
+        chips = [list(row) for row in board.chips]
+        assert rule.checkSeq(board.chips, plr_state, coords, window_counts) == rule.checkSeq(chips, plr_state, coords)
+        assert board.chips == chips #The joker cells are left as they are.
+
+@pytest.mark.parametrize('game_rule', [SequenceGameRule, BitboardGameRule])
+def test_undo_restores_state(game_rule):
+    rng = random.Random(0)
+    for rule in randomGames(4, game_rule):
+        state = rule.current_game_state
+        before = StateDump(state)
+        records = []
+        for _ in applyMoves(rule, state, rule.current_agent_index, rng.randint(1, 4), rng, records):
+            pass
+        for record in reversed(records):
+            rule.undo(state, record)
+        assert StateDump(state) == before
+
+@pytest.mark.parametrize('game_rule', [SequenceGameRule, BitboardGameRule])
+def test_incremental_zobrist_matches_recomputed(game_rule):
+    rng = random.Random(1)
+    for rule in randomGames(4, game_rule):
+        state, agent_id = rule.current_game_state, rule.current_agent_index
+        assert state.zobrist == ZobristHash(state, agent_id)
+        records = []
+        for next_agent in applyMoves(rule, state, agent_id, 3, rng, records):
+            assert state.zobrist == ZobristHash(state, next_agent)
+        for record in reversed(records):
+            rule.undo(state, record)
+        assert state.zobrist == ZobristHash(state, agent_id)
+
+@pytest.mark.parametrize('game_rule', [SequenceGameRule, BitboardGameRule])
+def test_team_totals_and_terminal_flag_follow_the_game(game_rule):
+    for rule in randomGames(4, game_rule):
+        state = rule.current_game_state
+        for clr in (RED, BLU):
+            assert TeamScore(state, clr) == sum(plr.completed_seqs for plr in state.agents if plr.colour==clr)
+        ended = TeamScore(state, RED)>=2 or TeamScore(state, BLU)>=2 or not state.board.draft
+        assert IsTerminal(state) == ended == rule.gameEnds()
+
+def test_action_space_matches_action_list():
+    rng = random.Random(2)
+    for rule in randomGames(3):
+        state, agent_id = rule.current_game_state, rule.current_agent_index
+        space = rule.getActionSpace(state, agent_id)
+        actions = space.toList()
+        assert len(space) == len(actions) and [space[i] for i in range(len(space))] == actions
+        assert all(action in space for action in actions)
+        for _ in range(5):
+            other = dict(rng.choice(actions)) if actions else {'play_card':None}
+            other['coords'] = (rng.randrange(10), rng.randrange(10))
+            other['draft_card'] = rng.choice(['2s', 'jd', 'kh'])
+            assert (other in space) == (other in actions)
+
+@pytest.mark.parametrize('game_rule', [SequenceGameRule, BitboardGameRule])
+def test_iterated_and_sampled_actions_are_the_legal_ones(game_rule):
+    for n,rule in enumerate(randomGames(3, game_rule)):
+        state, agent_id = rule.current_game_state, rule.current_agent_index
+        actions = rule.getLegalActions(state, agent_id)
+        assert list(rule.iterLegalActions(state, agent_id)) == actions
+        #The same draw from the same generator picks the same action as indexing the action list.
+        sampled = SampleLegalAction(state, agent_id, random.Random(n))
+        assert sampled == (actions[random.Random(n).randrange(len(actions))] if actions else None)
+
+def test_sampled_actions_are_uniform():
+    rng = random.Random(4)
+    for rule in randomGames(2):
+        if rule.current_game_state.agents[rule.current_agent_index].hand[0][0] == 'j': #A jack's many cells.
+            break
+    state, agent_id = rule.current_game_state, rule.current_agent_index
+    actions = rule.getLegalActions(state, agent_id)
+    draws = 300*len(actions)
+    counts = dict.fromkeys(actions, 0)
+    for _ in range(draws):
+        action = SampleLegalAction(state, agent_id, rng)
+        assert action in counts
+        counts[action] += 1
+    #Each action is drawn 300 times on average, with a standard deviation of about 17.
+    assert all(300-5*17 < count < 300+5*17 for count in counts.values())
+
+@pytest.mark.parametrize('game_rule', [SequenceGameRule, BitboardGameRule])
+def test_clone_matches_deepcopy_and_is_independent(game_rule):
+    rng = random.Random(6)
+    rule = game_rule(4, seed=6)
+    for _ in range(25):
+        rule.update(rng.choice(rule.getLegalActions(rule.current_game_state, rule.current_agent_index)))
+    state, agent_id = rule.current_game_state, rule.current_agent_index
+    before = StateDump(state)
+    clone, deep = state.clone(include_history=True), copy.deepcopy(state)
+    assert StateDump(clone) == StateDump(deep) == before
+    assert [plr.agent_trace.action_reward for plr in state.clone().agents] == [[]]*4
+
+    #The same moves on the clone and the deep copy deal the same cards from their copies of the RNG, and leave the
+    #original untouched.
+    for copied in (clone, deep):
+        records = []
+        for next_agent in applyMoves(rule, copied, agent_id, 6, random.Random(7), records):
+            pass
+        assert copied.zobrist == ZobristHash(copied, next_agent)
+    assert StateDump(clone) == StateDump(deep) != before
+    assert clone.deck.cards != state.deck.cards and clone.deck.rng.getstate() != state.deck.rng.getstate()
+    assert StateDump(state) == before
+    assert state.zobrist == ZobristHash(state, agent_id) and state.board.window_counts == WindowCounts(state.board.chips)
+
+    #An agent's copy lacks the deck and the other agents' hands, and so do its clones.
+    del deep.deck.cards, deep.deck.rng, deep.agents[1].hand
+    hidden = deep.clone()
+    assert not hasattr(hidden.deck, 'cards') and not hasattr(hidden.deck, 'rng') and not hasattr(hidden.agents[1], 'hand')
+
+def test_action_behaves_like_its_dict():
+    action = Action('jd', '5h', 'place', (3,4))
+    legacy = {'play_card':'jd', 'draft_card':'5h', 'type':'place', 'coords':(3,4)}
+    assert action == legacy and Action.fromDict(legacy) == action and dict(action) == legacy
+    assert action['coords'] == (3,4) and action.get('missing') is None
+    assert {action:1}[Action.fromDict(legacy)] == 1
+    assert copy.deepcopy(action) is action and pickle.loads(pickle.dumps(action)) == action
+    with pytest.raises(AttributeError):
+        action.type = 'remove'
+
+# END FILE -----------------------------------------------------------------------------------------------------------#
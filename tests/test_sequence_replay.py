@@ -0,0 +1,122 @@
+# INFORMATION ------------------------------------------------------------------------------------------------------- #
+
+# Author:  Jiawei Luo, Yifan Deng, Xinzhe Wang
+# Date:    10/18/2026
+# Purpose: Tests of binary replays: a game written by Game.Run loads back and replays, forward and with seek(), to the
+#          positions the game went through, and a replay cut short can still be read.
+
+# IMPORTS ------------------------------------------------------------------------------------------------------------#
+
+import pickle
+import random
+import pytest
+from conftest import StateDump
+from game import Game, GameReplayer
+from Sequence.sequence_model import SequenceGameRule
+from Sequence.sequence_replay import LoadReplay, ReplayWriter, IsBinaryReplay
+from agents.samples.random import myAgent
+
+# FUNCTIONS ----------------------------------------------------------------------------------------------------------#
+
+def playGame(path, seed, agents=None, state_rng=False):
+    agents = agents or [myAgent(i) for i in range(4)]
+    game = Game(SequenceGameRule, agents, 4, seed=seed, time_limit=None, agents_namelist=["a","b","c","d"],
+                replay_file=path, state_rng=state_rng)
+    return game, game.Run()
+
+# CLASS DEF ----------------------------------------------------------------------------------------------------------#
+
+#Picks actions from an RNG of its own, and draws a varying amount from the random module on the side.
+class NoisyAgent:
+    def __init__(self, _id, noise):
+        self.id = _id
+        self.rng = random.Random(_id)
+        self.noise = noise
+
+    def SelectAction(self, actions, game_state):
+        for _ in range(self.noise*(len(actions)%3)):
+            random.random()
+        return self.rng.choice(actions)
+
+# TESTS --------------------------------------------------------------------------------------------------------------#
+
+def test_replay_round_trip(tmp_path):
+    path = str(tmp_path / "game.replay")
+    game, history = playGame(path, 7)
+    assert IsBinaryReplay(path)
+    replay = LoadReplay(path)
+    assert replay["actions"] == history["actions"]
+    assert replay["scores"] == history["scores"]
+    assert replay["agents_namelist"] == ["a","b","c","d"] and replay["seed"] == 7
+
+    replayer = GameReplayer(SequenceGameRule, replay)
+    replayer.Run()
+    assert StateDump(replayer.game_rule.current_game_state) == StateDump(game.game_rule.current_game_state)
+
+def test_seek_lands_on_the_positions_played(tmp_path):
+    path = str(tmp_path / "game.replay")
+    game, _ = playGame(path, 11)
+    replay = LoadReplay(path)
+
+    #Every position, stepping forward without snapshots.
+    forward = GameReplayer(SequenceGameRule, replay, snapshot_interval=None)
+    positions = [StateDump(forward.game_rule.current_game_state)]
+    for index, info in forward:
+        assert index == forward.move_index-1 and info == replay["actions"][index][index]
+        positions.append(StateDump(forward.game_rule.current_game_state))
+    assert positions[-1] == StateDump(game.game_rule.current_game_state)
+    assert len(positions) == len(replay["actions"])+1 and not forward.snapshots
+    with pytest.raises(ValueError):
+        forward.seek(0)
+
+    #seek() back and forth lands on the same positions, from snapshots or by playing on.
+    replayer = GameReplayer(SequenceGameRule, replay, snapshot_interval=5)
+    replayer.Run()
+    rng = random.Random(0)
+    for move_index in [0, len(positions)-1] + [rng.randrange(len(positions)) for _ in range(10)]:
+        assert StateDump(replayer.seek(move_index)) == positions[move_index]
+        assert replayer.move_index == move_index
+
+def test_state_rng_games_do_not_depend_on_the_random_module(tmp_path):
+    path = str(tmp_path / "game.replay")
+    game, history = playGame(path, 9, [NoisyAgent(i, 0) for i in range(4)], state_rng=True)
+    _, noisy = playGame(None, 9, [NoisyAgent(i, 5) for i in range(4)], state_rng=True)
+    assert noisy["actions"] == history["actions"] and history["rng"] == "state"
+    #The deck and the game's own choices draw from different streams, both derived from the seed.
+    assert game.game_rule.current_game_state.deck.rng.getstate() != game.rng.getstate()
+
+    replay = LoadReplay(path)
+    assert replay["rng"] == "state"
+    replayer = GameReplayer(SequenceGameRule, replay, snapshot_interval=5)
+    replayer.Run()
+    assert StateDump(replayer.game_rule.current_game_state) == StateDump(game.game_rule.current_game_state)
+    middle = len(replay["actions"])//2
+    forward = GameReplayer(SequenceGameRule, replay, snapshot_interval=None)
+    for _ in range(middle):
+        forward.step()
+    assert StateDump(replayer.seek(middle)) == StateDump(forward.game_rule.current_game_state)
+
+def test_pickled_replays_still_load(tmp_path):
+    path = str(tmp_path / "game.replay")
+    _, history = playGame(None, 3)
+    with open(path, 'wb') as f:
+        f.write(pickle.dumps(history))
+    assert not IsBinaryReplay(path)
+    assert LoadReplay(path)["actions"] == history["actions"]
+
+def test_unfinished_replay_is_readable(tmp_path):
+    path = str(tmp_path / "game.replay")
+    _, history = playGame(None, 5)
+    writer = ReplayWriter(path, {"seed":5, "num_of_agent":4, "agents_namelist":["a","b","c","d"], "warning_limit":3})
+    for item in history["actions"][:10]:
+        (_, info), = item.items()
+        writer.writeAction(info["agent_id"], info["action"])
+    writer.writeWarning(1, 9)
+    writer.file.write(b'A\x00') #A record cut off by the crash.
+    writer.close()
+
+    replay = LoadReplay(path)
+    assert replay["actions"] == history["actions"][:10]
+    assert replay["warning_positions"] == [(1, 9)] and replay["scores"] == {}
+
+# END FILE -----------------------------------------------------------------------------------------------------------#